@@ -50,6 +50,7 @@ DJANGO_APPS = [
 THIRD_PARTY_APPS = []
 
 LOCAL_APPS = [
+    "utils",
     "pages.citation",
     "pages.dashboards",
     "pages.data_management",
@@ -66,14 +67,41 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # ------------------------------------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "utils.middleware.RequestMetricsMiddleware",
+    "utils.middleware.CompressionMiddleware",
+    "utils.middleware.QueryBudgetMiddleware",
+    "utils.middleware.ReplicaRoutingMiddleware",
+    # Read-only requests to public views skip the session, CSRF, auth and
+    # messages middleware below, and their responses carry no cookies
+    "utils.middleware.PublicRouteMiddleware",
+    "utils.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "utils.middleware.CsrfViewMiddleware",
+    "utils.middleware.AuthenticationMiddleware",
+    "utils.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Compress text responses with brotli or gzip (see utils.compression), unless
+# left to the ingress. Smaller responses do not gain from compression.
+COMPRESS_RESPONSES = env.bool("COMPRESS_RESPONSES", default=True)
+COMPRESSION_MIN_SIZE = 860
+
+# Minify the HTML of the pages rendered by the base views (see
+# utils.views.HtmlMinifyMixin); cached pages are stored minified
+HTML_MINIFY = env.bool("HTML_MINIFY", default=False)
+
+# Seconds shared caches (CDN, reverse proxy) may serve public responses
+# without revalidating them, see utils.middleware.PublicRouteMiddleware
+PUBLIC_CACHE_MAX_AGE = env.int("PUBLIC_CACHE_MAX_AGE", default=0)
+
+
+# WARM-UP (see utils.warmup)
+# ------------------------------------------------------------------------------
+# Import views, compile templates and connect to the databases when the WSGI or
+# ASGI application is loaded, before the first request
+WARM_UP = env.bool("WARM_UP", default=False)
+
 
 # URLS
 # ------------------------------------------------------------------------------
@@ -91,12 +119,16 @@ TEMPLATES = [
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
+                "utils.context_processors.auth",
+                "utils.context_processors.messages",
+                "utils.context_processors.templates_version",
             ],
         },
     },
 ]
+# The admin checks look for the Django auth and messages context processors
+# by name; the wrappers above call them on every route but the public ones
+SILENCED_SYSTEM_CHECKS = ["admin.E402", "admin.E404"]
 
 
 # DATABASES (https://docs.djangoproject.com/en/5.2/ref/settings/#databases)
@@ -105,12 +137,91 @@ DATABASES = {
     "default": {
         **env.db("DATABASE_URL"),
         "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=0),
+        # Check persistent or pooled connections before handing them out
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Optional read replica of the primary database: public list, detail and
+# dashboard data views read from it, while the admin and management commands
+# use the primary (see utils.db). Clients that wrote are pinned to the primary
+# for DB_REPLICA_PIN_SECONDS, longer than the expected replication lag.
+if env("DATABASE_REPLICA_URL", default=None):
+    DATABASES["replica"] = {
+        **env.db("DATABASE_REPLICA_URL"),
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=0),
+        "CONN_HEALTH_CHECKS": True,
+        # Tests read the primary through this alias
+        "TEST": {"MIRROR": "default"},
     }
+
+DATABASE_ROUTERS = ["utils.db.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = env.int("DB_REPLICA_PIN_SECONDS", default=15)
+
+# PostgreSQL connection pool (psycopg_pool), one per worker process. Size it
+# for the threads of a worker (GUNICORN_THREADS); a request waits up to
+# DB_POOL_TIMEOUT seconds for a free connection, then fails.
+DB_POOL = env.bool("DB_POOL", default=False)
+DB_POOL_OPTIONS = {
+    "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+    "max_size": env.int("DB_POOL_MAX_SIZE", default=4),
+    "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+    "max_idle": env.float("DB_POOL_MAX_IDLE", default=600.0),
+    "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
 }
+# Seconds between two checks of the pools for waiting requests, logged as
+# saturation warnings (see utils.db); 0 disables the checks
+DB_POOL_LOG_INTERVAL = env.int("DB_POOL_LOG_INTERVAL", default=60)
+# Behind pgbouncer in transaction pooling mode, server-side cursors (used by
+# `QuerySet.iterator()`) break as a transaction may change server connection
+DB_PGBOUNCER = env.bool("DB_PGBOUNCER", default=False)
+
+for _database in DATABASES.values():
+    if _database["ENGINE"] != "django.db.backends.postgresql":
+        continue
+    _database["DISABLE_SERVER_SIDE_CURSORS"] = DB_PGBOUNCER
+    if DB_POOL:
+        # Pooled connections are returned to the pool after each request
+        _database["CONN_MAX_AGE"] = 0
+        _database["OPTIONS"] = {**_database.get("OPTIONS", {}), "pool": DB_POOL_OPTIONS}
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# CACHES (https://docs.djangoproject.com/en/5.2/ref/settings/#caches)
+# ------------------------------------------------------------------------------
+# Per-process memory by default; deployments should point CACHE_URL to a
+# backend shared by all workers (e.g. `filecache:///dev/shm/spp-cache`)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+    # Objects and query results of the public views (see utils.object_cache)
+    "objects": env.cache("OBJECT_CACHE_URL", default="locmemcache://objects"),
+}
+
+
+# METRICS (see utils.metrics)
+# ------------------------------------------------------------------------------
+# Directory where each worker process writes its request histograms, so that
+# the metrics endpoint reports all workers (per-process only when unset)
+METRICS_DIR = env("METRICS_DIR", default=None)
+# Bearer token letting scrapers read the metrics without an admin session
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+
+# DASHBOARDS (see pages.dashboards.history)
+# ------------------------------------------------------------------------------
+# Number of changes kept per dashboard for delta fetches; clients holding an
+# older version get the full document
+DASHBOARD_HISTORY_LENGTH = env.int("DASHBOARD_HISTORY_LENGTH", default=30)
+
+
+# QUERY BUDGETS (see utils.query_budget)
+# ------------------------------------------------------------------------------
+# What to do when a request exceeds the `query_budget` of its view: "log",
+# "raise" or nothing (the default, as recording queries has a cost)
+QUERY_BUDGET_ACTION = env("QUERY_BUDGET_ACTION", default=None)
+
+
 # PASSWORDS (https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators)
 # ------------------------------------------------------------------------------
 AUTH_PASSWORD_VALIDATORS = [
@@ -132,6 +243,14 @@ AUTH_PASSWORD_VALIDATORS = [
 # STATIC FILES (https://docs.djangoproject.com/en/5.2/ref/settings/#static-files)
 # ------------------------------------------------------------------------------
 # REVIEW: These will depend on our static file serving strategy
-STATIC_ROOT = BASE_DIR / "staticfiles"
+STATIC_ROOT = env.path("STATIC_ROOT", default=BASE_DIR / "staticfiles")
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "core" / "static"]
+
+# Transfer size budgets (bytes) of collected static files, checked at build time
+# by `static_size_report`: the smallest variant a client can get of each file
+# matching a pattern (brotli/gzip, AVIF/WebP) must fit within the budget
+STATIC_SIZE_BUDGETS = {
+    "images/*": 64 * 1024,
+    "css/*": 64 * 1024,
+}
@@ -26,6 +26,11 @@ MIDDLEWARE += [  # noqa: F405
 ]
 
 
+# QUERY BUDGETS
+# ------------------------------------------------------------------------------
+QUERY_BUDGET_ACTION = env("QUERY_BUDGET_ACTION", default="log")
+
+
 # SECURITY
 # ------------------------------------------------------------------------------
 CSRF_TRUSTED_ORIGINS = ["http://localhost:8000", "http://127.0.0.1:8000"]
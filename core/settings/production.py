@@ -5,7 +5,7 @@ These settings are intended for deployments.
 """
 
 from .base import *  # noqa: F401,F403
-from .base import env
+from .base import MIDDLEWARE, TEMPLATES, env
 
 
 DEBUG = False
@@ -36,7 +36,105 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = env.bool(
 SECURE_HSTS_PRELOAD = env.bool("SECURE_HSTS_PRELOAD", default=False)
 
 
+# HTML MINIFICATION
+# ------------------------------------------------------------------------------
+# Rendered pages are minified before being cached (see utils.views.HtmlMinifyMixin)
+HTML_MINIFY = env.bool("HTML_MINIFY", default=True)
+
+
+# WARM-UP
+# ------------------------------------------------------------------------------
+# Run by the gunicorn master (`--preload`) before forking the workers
+WARM_UP = env.bool("WARM_UP", default=True)
+
+
+# TEMPLATES (https://docs.djangoproject.com/en/5.2/ref/templates/api/#django.template.loaders.cached.Loader)
+# ------------------------------------------------------------------------------
+# Compiled templates are kept in memory for the lifetime of the worker. They are
+# all compiled at startup (see `utils.warmup`), before serving any request.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
+
+
+# CACHES
+# ------------------------------------------------------------------------------
+# Shared by all gunicorn workers of a pod, no extra service needed
+CACHES = {
+    "default": env.cache("CACHE_URL", default="filecache:///dev/shm/spp-cache"),
+    "objects": env.cache(
+        "OBJECT_CACHE_URL", default="filecache:///dev/shm/spp-objects"
+    ),
+}
+
+
+# METRICS
+# ------------------------------------------------------------------------------
+# Shared by all gunicorn workers of a pod, cleared when the pod restarts
+METRICS_DIR = env("METRICS_DIR", default="/dev/shm/spp-metrics")
+
+
+# STATIC FILES (https://whitenoise.readthedocs.io/en/stable/django.html)
+# ------------------------------------------------------------------------------
+# `collectstatic` optimizes images (see `utils.assets`) and writes content-hashed
+# copies of every file, a manifest used by `{% static %}` to emit the hashed
+# URLs, and gzip/brotli variants. WhiteNoise serves them with
+# `Cache-Control: immutable` and Accept-Encoding negotiation.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "utils.storage.OptimizedStaticFilesStorage",
+    },
+}
+
+# Right after SecurityMiddleware, so static requests skip the rest of the stack
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    *MIDDLEWARE[1:],
+]
+
+
 # MEDIA FILES (Production)
 # ------------------------------------------------------------------------------
 MEDIA_ROOT = env("MEDIA_ROOT")
 MEDIA_URL = env("MEDIA_URL", default="media").rstrip("/") + "/"
+
+
+# LOGGING (https://docs.djangoproject.com/en/5.2/topics/logging/)
+# ------------------------------------------------------------------------------
+# Project loggers (e.g. the worker warm-up timings) write to the container output
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "level": "INFO",
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "utils": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
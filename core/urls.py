@@ -20,7 +20,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from utils.views import MetricsView
+
 urlpatterns = [
+    path(f"{settings.ADMIN_URL}metrics/", MetricsView.as_view(), name="metrics"),
     path(settings.ADMIN_URL, admin.site.urls, name="admin"),
     path("", include("pages.home.urls")),
     path("citation/", include("pages.citation.urls")),
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.production")
 
 application = get_wsgi_application()
+
+# Pay one-time costs before serving the first request (in the gunicorn master
+# process with `--preload`, shared with the workers). Off by default, so
+# that `runserver` and management commands start fast.
+from django.conf import settings
+
+if settings.WARM_UP:
+    from utils.warmup import warm_up
+
+    warm_up()
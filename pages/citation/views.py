@@ -4,5 +4,7 @@ from utils.views import BaseTemplateView
 class Citation(BaseTemplateView):
     template_name = "citation/index.html"
     title = "How to cite the Portal"
+    cache_timeout = 60 * 60
+    query_budget = 0
 
 
@@ -0,0 +1,227 @@
+"""Vectorized aggregation of columnar dashboard data.
+
+Column buffers (see `pages.dashboards.columnar`) are read as NumPy arrays
+without copying, then reduced for charts that cannot show every row:
+
+- `bucket()` groups the rows by calendar period of a date or datetime index
+  column (hour, day, week, month or year) and reduces every other column to
+  the mean, minimum, maximum or sum of each period. Missing values are
+  ignored; a period with none left reduces to a missing value.
+- `downsample()` keeps a given number of rows with the Largest-Triangle-
+  Three-Buckets algorithm, which preserves the visual shape of a series
+  (peaks and troughs) far better than keeping every n-th row.
+
+Both take and return the index and the value columns as arrays of stored
+scalars, so results are converted back to JSON values with `to_json()`.
+"""
+
+import math
+
+import numpy as np
+
+from . import columnar
+
+AGGREGATES = ("mean", "min", "max", "sum")
+
+# Calendar periods -> NumPy datetime unit (weeks are computed, starting Monday)
+BUCKETS = {
+    "hour": "h",
+    "day": "D",
+    "week": None,
+    "month": "M",
+    "year": "Y",
+}
+
+# Days between the epoch (a Thursday) and the following Monday
+_MONDAY = 4
+
+_SECONDS_PER_DAY = 86400
+
+
+def to_array(dtype, buffer):
+    """Return a little-endian column buffer as an array of stored scalars."""
+    return np.frombuffer(buffer, dtype="<f8" if dtype == "<f8" else "<i8")
+
+
+def to_json(dtype, values):
+    """Return an array of stored scalars of a dtype as a list of JSON values."""
+    if dtype == "<f8":
+        return [
+            None if math.isnan(value) else value
+            for value in values.astype("<f8").tolist()
+        ]
+    if dtype == "<i8":
+        return values.tolist()
+    return [columnar.from_scalar(dtype, value) for value in values.tolist()]
+
+
+def is_missing(dtype, values):
+    """Return the mask of missing values of an array of stored scalars."""
+    if dtype == "<f8":
+        return np.isnan(values)
+    if dtype == "<i8":
+        return np.zeros(len(values), dtype=bool)
+    return values == columnar.NAT
+
+
+def sort_rows(index, columns):
+    """Return the index and columns ordered by index, if not sorted already."""
+    if not len(index) or np.all(index[1:] >= index[:-1]):
+        return index, columns
+    order = np.argsort(index, kind="stable")
+    return index[order], {
+        name: (dtype, values[order]) for name, (dtype, values) in columns.items()
+    }
+
+
+def period_starts(dtype, index, period):
+    """Return the start of the calendar period of every index scalar.
+
+    Raises:
+        ValueError: If the index is not a date or datetime column, or the
+            period is shorter than a day for a date column.
+    """
+    if dtype not in ("<M8[D]", "<M8[s]"):
+        raise ValueError("Buckets need a date or datetime index column")
+    if period not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{period}', use one of {', '.join(BUCKETS)}")
+    if dtype == "<M8[D]" and period == "hour":
+        raise ValueError("Hourly buckets need a datetime index column")
+
+    if period == "week":
+        days = index if dtype == "<M8[D]" else index // _SECONDS_PER_DAY
+        weeks = days - (days - _MONDAY) % 7
+        return weeks if dtype == "<M8[D]" else weeks * _SECONDS_PER_DAY
+
+    unit = dtype[4:-1]
+    moments = index.view(f"M8[{unit}]")
+    return moments.astype(f"M8[{BUCKETS[period]}]").astype(f"M8[{unit}]").view("<i8")
+
+
+def bucket(index_dtype, index, columns, period, aggregate):
+    """Aggregate value columns per calendar period of the index column.
+
+    Args:
+        index_dtype (str): Dtype of the index column.
+        index (ndarray): Index scalars; rows with a missing index are
+            dropped.
+        columns (dict): Column name -> (dtype, ndarray of scalars).
+        period (str): One of `BUCKETS`.
+        aggregate (str): One of `AGGREGATES`.
+
+    Returns:
+        tuple: The period starts (index scalars) and the aggregated columns
+        as a name -> (dtype, ndarray) dict. Means are always floats.
+    """
+    if aggregate not in AGGREGATES:
+        raise ValueError(
+            f"Unknown aggregate '{aggregate}', use one of {', '.join(AGGREGATES)}"
+        )
+    index, columns = sort_rows(index, columns)
+    present = ~is_missing(index_dtype, index)
+    keys = period_starts(index_dtype, index[present], period)
+    if not len(keys):
+        return keys, {
+            name: (dtype, values[:0]) for name, (dtype, values) in columns.items()
+        }
+
+    # Rows are sorted: every key change starts a bucket
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    aggregated = {}
+    for name, (dtype, values) in columns.items():
+        values = values[present]
+        if dtype in ("<M8[D]", "<M8[s]"):
+            # Dates have no mean nor sum, keep the first of the period
+            aggregated[name] = (dtype, values[starts])
+            continue
+        if dtype == "<i8" and aggregate != "mean":
+            reduce = {"min": np.minimum, "max": np.maximum, "sum": np.add}[aggregate]
+            aggregated[name] = (dtype, reduce.reduceat(values, starts))
+            continue
+
+        values = values.astype("<f8")
+        missing = np.isnan(values)
+        counts = np.add.reduceat(~missing, starts)
+        if aggregate == "min":
+            result = np.fmin.reduceat(values, starts)
+        elif aggregate == "max":
+            result = np.fmax.reduceat(values, starts)
+        else:
+            result = np.add.reduceat(np.where(missing, 0.0, values), starts)
+            if aggregate == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result = result / counts
+        result[counts == 0] = np.nan
+        aggregated[name] = ("<f8", result)
+    return keys[starts], aggregated
+
+
+def lttb(x, y, points):
+    """Return the positions of the rows kept by Largest-Triangle-Three-Buckets.
+
+    The first and last rows are always kept. The other rows are split into
+    `points - 2` buckets, from each of which the row forming the largest
+    triangle with the previously kept row and the mean of the next bucket
+    is kept.
+
+    Args:
+        x (ndarray): Increasing float x values.
+        y (ndarray): Float y values, without missing values.
+        points (int): Number of rows to keep, at least 3.
+    """
+    length = len(x)
+    if points >= length:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    # Mean point of each bucket, the target of the previous bucket's triangle
+    sums_x = np.add.reduceat(x[1 : length - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1 : length - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    means_x = np.r_[sums_x / sizes, x[-1]]
+    means_y = np.r_[sums_y / sizes, y[-1]]
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket_number in range(points - 2):
+        start, stop = edges[bucket_number], edges[bucket_number + 1]
+        target_x, target_y = means_x[bucket_number + 1], means_y[bucket_number + 1]
+        # Twice the triangle areas, for every row of the bucket at once
+        areas = np.abs(
+            (x[previous] - target_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (target_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket_number + 1] = previous
+    return kept
+
+
+def downsample(index_dtype, index, columns, points):
+    """Keep `points` rows of the columns, chosen by LTTB on the first value column.
+
+    Rows where the index or the first value column is missing are dropped.
+    All columns keep the same rows, so the result stays a table; request a
+    single value column per chart for the most faithful shape.
+
+    Returns:
+        tuple: The kept index scalars and columns, as for `bucket()`.
+    """
+    if points < 3:
+        raise ValueError("At least 3 points are needed")
+    index, columns = sort_rows(index, columns)
+    present = ~is_missing(index_dtype, index)
+    if columns:
+        dtype, values = next(iter(columns.values()))
+        present &= ~is_missing(dtype, values)
+    rows = np.flatnonzero(present)
+
+    x = index[rows].astype("<f8")
+    if columns:
+        y = next(iter(columns.values()))[1][rows].astype("<f8")
+    else:
+        y = np.zeros(len(rows))
+    rows = rows[lttb(x, y, points)]
+    return index[rows], {
+        name: (dtype, values[rows]) for name, (dtype, values) in columns.items()
+    }
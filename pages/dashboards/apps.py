@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class DashboardsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pages.dashboards"
+
+    def ready(self):
+        """Invalidate the cached DashboardData objects when one changes."""
+        from django.db.models.signals import post_delete, post_save
+
+        from utils.object_cache import invalidate_on_change
+
+        from .models import DashboardData
+
+        post_save.connect(invalidate_on_change, sender=DashboardData)
+        post_delete.connect(invalidate_on_change, sender=DashboardData)
@@ -0,0 +1,222 @@
+"""Columnar encoding of tabular dashboard data.
+
+Tabular dashboard data (a list of records or a mapping of column name to
+values) can be stored as one typed buffer per column. Buffers use a
+little-endian layout readable as-is with `numpy.frombuffer(buffer, dtype)`,
+so reading a column subset or a row range only needs the matching bytes.
+
+The first column is the index column. When its values are sorted, the
+first value of every block of `BLOCK_ROWS` rows is kept as a zone map, so
+a row range bound is located by reading at most one block.
+"""
+
+import array
+import bisect
+import itertools
+import math
+import sys
+from datetime import UTC, date, datetime
+
+BLOCK_ROWS = 4096
+
+# Size in bytes of one value, the same for every supported dtype
+ITEMSIZE = 8
+
+# NumPy dtype string -> `array` typecode of the same layout
+DTYPES = {
+    "<f8": "d",
+    "<i8": "q",
+    "<M8[D]": "q",
+    "<M8[s]": "q",
+}
+
+# NumPy "not a time" value used for missing dates and datetimes
+NAT = -(2**63)
+
+EPOCH = date(1970, 1, 1)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return _is_int(value) or isinstance(value, float)
+
+
+def _parse_date(value):
+    if len(value) != 10:
+        raise ValueError(f"Invalid date: {value!r}")
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def _parse_datetime(value):
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return int(moment.timestamp())
+
+
+def _all_parse(parser, values):
+    try:
+        for value in values:
+            parser(value)
+    except ValueError:
+        return False
+    return True
+
+
+def infer_dtype(values):
+    """Return the column dtype for a list of JSON values, or None if unsupported.
+
+    Integers are stored as int64 (float64 if some are missing), numbers as
+    float64, ISO dates as days and ISO datetimes as seconds since the epoch.
+    """
+    present = [value for value in values if value is not None]
+    if not present:
+        return None
+    if all(_is_int(value) for value in present):
+        return "<i8" if len(present) == len(values) else "<f8"
+    if all(_is_number(value) for value in present):
+        return "<f8"
+    if all(isinstance(value, str) for value in present):
+        if _all_parse(_parse_date, present):
+            return "<M8[D]"
+        if _all_parse(_parse_datetime, present):
+            return "<M8[s]"
+    return None
+
+
+def to_scalar(dtype, value):
+    """Convert a JSON value (or query bound) to the stored scalar of a dtype."""
+    if dtype == "<f8":
+        return math.nan if value is None else float(value)
+    if value is None:
+        return NAT
+    if dtype == "<i8":
+        return int(value)
+    if dtype == "<M8[D]":
+        return _parse_date(value)
+    return _parse_datetime(value)
+
+
+def from_scalar(dtype, value):
+    """Convert a stored scalar of a dtype back to a JSON value."""
+    if dtype == "<f8":
+        return None if math.isnan(value) else value
+    if dtype == "<i8":
+        return value
+    if value == NAT:
+        return None
+    if dtype == "<M8[D]":
+        return date.fromordinal(EPOCH.toordinal() + value).isoformat()
+    return datetime.fromtimestamp(value, tz=UTC).isoformat()
+
+
+def to_columns(data):
+    """Return the data as a mapping of column name to list of values.
+
+    Raises:
+        ValueError: If the data is neither a list of records nor a mapping of
+            equally long lists.
+    """
+    if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+        names = list(dict.fromkeys(name for row in data for name in row))
+        return {name: [row.get(name) for row in data] for name in names}
+
+    if (
+        isinstance(data, dict)
+        and data
+        and all(isinstance(values, list) for values in data.values())
+        and len({len(values) for values in data.values()}) == 1
+    ):
+        return data
+
+    raise ValueError(
+        "Data must be a list of records or a mapping of equally long lists"
+    )
+
+
+def encode(dtype, values):
+    """Return the little-endian buffer of the values for a dtype."""
+    buffer = array.array(DTYPES[dtype], (to_scalar(dtype, value) for value in values))
+    if sys.byteorder == "big":
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def decode(dtype, buffer):
+    """Return the values of a little-endian buffer as JSON values."""
+    scalars = array.array(DTYPES[dtype])
+    scalars.frombytes(buffer)
+    if sys.byteorder == "big":
+        scalars.byteswap()
+    return [from_scalar(dtype, value) for value in scalars]
+
+
+def block_starts(dtype, values):
+    """Return the zone map of a sorted index column, or an empty list.
+
+    The zone map holds the first stored scalar of every block of rows.
+    Columns with missing values or unsorted values get no zone map.
+    """
+    if None in values:
+        return []
+    scalars = [to_scalar(dtype, value) for value in values]
+    if any(a > b for a, b in itertools.pairwise(scalars)):
+        return []
+    return scalars[::BLOCK_ROWS]
+
+
+def encode_table(data):
+    """Encode tabular data into typed columns.
+
+    Columns whose values have no supported dtype (e.g. free text) are
+    skipped; they remain available in the JSON document.
+
+    Returns:
+        tuple: A list of column dicts (name, position, dtype, length,
+        block_starts, buffer) and the list of skipped column names.
+    """
+    columns, skipped = [], []
+    for name, values in to_columns(data).items():
+        dtype = infer_dtype(values)
+        if dtype is None:
+            skipped.append(name)
+            continue
+        columns.append(
+            {
+                "name": name,
+                "position": len(columns),
+                "dtype": dtype,
+                "length": len(values),
+                "block_starts": block_starts(dtype, values) if not columns else [],
+                "buffer": encode(dtype, values),
+            }
+        )
+    return columns, skipped
+
+
+def locate(column, bound, read_block, right=False):
+    """Return the row where `bound` would be inserted in a sorted index column.
+
+    Only the zone map and a single block of the column are used. The block
+    is fetched through `read_block(start_row, stop_row)`, which returns the
+    little-endian buffer of these rows.
+
+    Args:
+        column: The index column (with `dtype`, `length` and `block_starts`).
+        bound: The stored scalar to locate.
+        read_block: Callable returning the buffer of a row range.
+        right (bool): Locate after (True) or before (False) equal values.
+    """
+    search = bisect.bisect_right if right else bisect.bisect_left
+    block = max(search(column.block_starts, bound) - 1, 0)
+    start = block * BLOCK_ROWS
+    stop = min(start + BLOCK_ROWS, column.length)
+
+    scalars = array.array(DTYPES[column.dtype])
+    scalars.frombytes(read_block(start, stop))
+    if sys.byteorder == "big":
+        scalars.byteswap()
+    return start + search(scalars, bound)
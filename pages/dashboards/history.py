@@ -0,0 +1,88 @@
+"""Compact deltas between versions of dashboard data documents.
+
+Every change of a `DashboardData` document is stored as the delta from the
+previous version (see `DashboardDataChange`), computed by `diff()`:
+
+- Lists are compared by their common head and tail, and the delta is a
+  single splice: ``{"splice": [start, deleted, [inserted items]]}``. A
+  nightly refresh appending rows to a list of records is therefore stored
+  as the new rows only.
+- Objects are compared key by key: ``{"keys": {key: delta}, "remove":
+  [keys]}``, with the delta of a new key being a replacement.
+- Anything else is replaced: ``{"replace": value}``.
+
+`apply()` applies a delta to the previous document, as clients of the delta
+endpoint do for each change in order.
+
+Values are compared with their types (`same()`): `1`, `1.0` and `true` are
+equal in Python but not in the JSON sent to clients.
+"""
+
+
+def same(old, new):
+    """Return True if two JSON values are equal, including their types."""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, list):
+        return len(old) == len(new) and all(map(same, old, new))
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(
+            same(value, new[key]) for key, value in old.items()
+        )
+    return old == new
+
+
+def diff(old, new):
+    """Return the delta turning the `old` JSON value into `new`, None if equal."""
+    if same(old, new):
+        return None
+
+    if isinstance(old, list) and isinstance(new, list):
+        shortest = min(len(old), len(new))
+        head = 0
+        while head < shortest and same(old[head], new[head]):
+            head += 1
+        # The tail may not overlap the head in either list
+        tail = 0
+        while tail < shortest - head and same(old[-1 - tail], new[-1 - tail]):
+            tail += 1
+        return {"splice": [head, len(old) - head - tail, new[head : len(new) - tail]]}
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta = {}
+        keys = {}
+        for key, value in new.items():
+            if key not in old:
+                keys[key] = {"replace": value}
+            else:
+                change = diff(old[key], value)
+                if change is not None:
+                    keys[key] = change
+        if keys:
+            delta["keys"] = keys
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta["remove"] = removed
+        return delta
+
+    return {"replace": new}
+
+
+def apply(document, delta):
+    """Return the document with the delta applied (the document is not modified)."""
+    if delta is None:
+        return document
+    if "replace" in delta:
+        return delta["replace"]
+    if "splice" in delta:
+        start, deleted, inserted = delta["splice"]
+        return [*document[:start], *inserted, *document[start + deleted :]]
+
+    document = {
+        key: value
+        for key, value in document.items()
+        if key not in delta.get("remove", ())
+    }
+    for key, change in delta.get("keys", {}).items():
+        document[key] = apply(document.get(key), change)
+    return document
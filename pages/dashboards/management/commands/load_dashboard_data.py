@@ -0,0 +1,277 @@
+import csv
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.dashboards.models import DashboardData
+
+CHUNK_SIZE = 64 * 1024
+
+# Structural characters outside strings, and the ones ending or escaping
+# inside strings
+_TOKENS = re.compile(r'["\[\]{},]')
+_STRING_TOKENS = re.compile(r'["\\]')
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _decode_item(decoder, text):
+    text = text.strip(" \t\n\r")
+    try:
+        item, end = decoder.raw_decode(text)
+    except json.JSONDecodeError:
+        raise ValueError("Invalid JSON array item") from None
+    if end != len(text):
+        raise ValueError("Invalid JSON array item")
+    return item
+
+
+def _iter_json_array(file):
+    """Yield the items of a top-level JSON array, reading the file in chunks.
+
+    Items are decoded directly from the chunk when followed by a delimiter
+    in it. Items running past the end of the chunk are scanned for their end
+    (a comma or the closing bracket outside strings and nested values)
+    instead, and only decoded once complete, so reading stays linear in the
+    size of the items.
+
+    Raises:
+        ValueError: If the file is not a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    chunk = ""
+    while not chunk.strip():
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("Empty JSON document")
+    chunk = chunk.lstrip()
+    if chunk[0] != "[":
+        raise ValueError("Not a JSON array")
+
+    # Text of the current item read with the previous chunks
+    pieces = []
+    start = position = 1
+    depth = 0
+    in_string = escaped = False
+    count = 0
+    at_item_start = True
+    while True:
+        while position < len(chunk):
+            if at_item_start:
+                at_item_start = False
+                try:
+                    item, end = decoder.raw_decode(
+                        chunk, _WHITESPACE.match(chunk, position).end()
+                    )
+                except json.JSONDecodeError:
+                    # Empty, invalid or incomplete: left to the scan below
+                    continue
+                delimiter = _WHITESPACE.match(chunk, end).end()
+                if delimiter < len(chunk) and chunk[delimiter] in ",]":
+                    yield item
+                    count += 1
+                    if chunk[delimiter] == "]":
+                        return
+                    start = position = delimiter + 1
+                    at_item_start = True
+                continue
+
+            if in_string:
+                match = _STRING_TOKENS.search(chunk, position)
+                if match is None:
+                    position = len(chunk)
+                    break
+                position = match.end()
+                if match.group() == '"':
+                    in_string = False
+                elif position == len(chunk):
+                    escaped = True
+                else:
+                    position += 1
+                continue
+
+            match = _TOKENS.search(chunk, position)
+            if match is None:
+                position = len(chunk)
+                break
+            token, position = match.group(), match.end()
+            if token == '"':
+                in_string = True
+            elif token in "[{":
+                depth += 1
+            elif depth:
+                if token in "]}":
+                    depth -= 1
+            elif token == "}":
+                raise ValueError("Invalid JSON array item")
+            else:
+                text = "".join(pieces) + chunk[start : match.start()]
+                pieces = []
+                start = position
+                if text.strip(" \t\n\r"):
+                    yield _decode_item(decoder, text)
+                    count += 1
+                # Only an empty array may have no item before its bracket
+                elif token == "," or count:
+                    raise ValueError("Empty JSON array element")
+                if token == "]":
+                    return
+                at_item_start = True
+
+        pieces.append(chunk[start:])
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("Unterminated JSON array")
+        start = 0
+        # Skip the character escaped at the end of the previous chunk
+        position = 1 if escaped else 0
+        escaped = False
+        if all(_WHITESPACE.fullmatch(piece) for piece in pieces):
+            # Only whitespace read since the last item
+            pieces = []
+            at_item_start = True
+
+
+def read_json(path):
+    """Read a JSON file, decoding top-level arrays item by item."""
+    with path.open(encoding="utf-8") as file:
+        head = file.read(CHUNK_SIZE)
+        if not head.lstrip().startswith("["):
+            # Non-array documents cannot be split and are decoded in one go
+            return json.loads(head + file.read())
+        file.seek(0)
+        return list(_iter_json_array(file))
+
+
+def read_json_lines(path):
+    """Read a JSON Lines file, one record per line."""
+    with path.open(encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def _csv_value(value):
+    if value == "":
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_csv(path):
+    """Read a CSV file with a header row as a list of records."""
+    with path.open(encoding="utf-8", newline="") as file:
+        return [
+            {name: _csv_value(value) for name, value in row.items()}
+            for row in csv.DictReader(file)
+        ]
+
+
+READERS = {
+    ".json": read_json,
+    ".jsonl": read_json_lines,
+    ".ndjson": read_json_lines,
+    ".csv": read_csv,
+}
+
+
+class Command(BaseCommand):
+    """Bulk load dashboard data from a directory of JSON or CSV files.
+
+    Each file is loaded into the `DashboardData` row named after the file
+    stem (`wastewater.csv` -> `wastewater`). Files are read and saved one at
+    a time, each in its own transaction, so only one document is held in
+    memory. Files whose content hash matches the stored one are skipped,
+    leaving `updated_at` (and therefore HTTP validators and caches)
+    untouched. Updated rows get a new version, with the delta from the
+    previous data in their change history.
+
+    Supported formats: `.json` (top-level arrays are read item by item),
+    `.jsonl`/`.ndjson` and `.csv` (with a header row; numeric cells are
+    converted to numbers and empty cells to null).
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py load_dashboard_data /data/dashboards
+            python manage.py load_dashboard_data /data/dashboards --dry-run
+    """
+
+    help = "Bulk load dashboard data from a directory of JSON or CSV files."
+
+    def add_arguments(self, parser):
+        """Add command line arguments and options."""
+        parser.add_argument("directory", type=Path, help="Directory of data files.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing to the database.",
+        )
+
+    def handle(self, *args, **options):
+        """Load every supported file and save the changed dashboards."""
+        directory = options["directory"]
+        if not directory.is_dir():
+            raise CommandError(f"'{directory}' is not a directory")
+
+        files = {}
+        max_length = DashboardData._meta.get_field("dashboard").max_length
+        for path in sorted(directory.iterdir()):
+            reader = READERS.get(path.suffix.lower())
+            if reader is None or not path.is_file():
+                continue
+            if len(path.stem) > max_length:
+                raise CommandError(f"Dashboard name too long: '{path.stem}'")
+            if path.stem in files:
+                raise CommandError(f"Several files for dashboard '{path.stem}'")
+            files[path.stem] = (path, reader)
+
+        counts = Counter()
+        for path, reader in files.values():
+            counts[self.load(path, reader, options["dry_run"])] += 1
+
+        summary = (
+            f"{counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged"
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run: {summary}.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Dashboard data loaded: {summary}."))
+
+    def load(self, path, reader, dry_run):
+        """Load a file into its dashboard.
+
+        Returns:
+            str: "created", "updated" or "unchanged".
+        """
+        try:
+            data = reader(path)
+        except ValueError as error:
+            raise CommandError(f"Could not read '{path}': {error}") from error
+
+        dashboard = (
+            DashboardData.objects.filter(dashboard=path.stem).defer("data").first()
+        )
+        if dashboard is None:
+            status = "created"
+            dashboard = DashboardData(dashboard=path.stem)
+        elif dashboard.content_hash == DashboardData.hash_data(data):
+            return "unchanged"
+        else:
+            status = "updated"
+        if dry_run:
+            return status
+
+        # save() keeps the hash, version, history and typed columns in sync
+        dashboard.data = data
+        try:
+            dashboard.save()
+        except ValueError as error:
+            # e.g. data that is no longer tabular for a columnar dashboard
+            raise CommandError(f"Could not store '{path}': {error}") from error
+        return status
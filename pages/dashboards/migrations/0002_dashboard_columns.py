@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def store_buffers_uncompressed(apps, schema_editor):
+    # Uncompressed TOAST storage lets PostgreSQL read byte ranges of a buffer
+    # (substr) without fetching and decompressing the whole value
+    if schema_editor.connection.vendor == "postgresql":
+        table = schema_editor.quote_name("dashboards_dashboardcolumn")
+        schema_editor.execute(f'ALTER TABLE {table} ALTER COLUMN "buffer" SET STORAGE EXTERNAL')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboarddata',
+            name='columnar',
+            field=models.BooleanField(default=False, help_text='Also store tabular data as typed columns for sliced reads'),
+        ),
+        migrations.CreateModel(
+            name='DashboardColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('dtype', models.CharField(choices=[('<f8', 'float64'), ('<i8', 'int64'), ('<M8[D]', 'date'), ('<M8[s]', 'datetime')], max_length=8)),
+                ('length', models.PositiveIntegerField()),
+                ('block_starts', models.JSONField(blank=True, default=list)),
+                ('buffer', models.BinaryField()),
+                ('dashboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='columns', to='dashboards.dashboarddata')),
+            ],
+            options={
+                'ordering': ('dashboard', 'position'),
+                'constraints': [models.UniqueConstraint(fields=('dashboard', 'name'), name='unique_dashboard_column')],
+            },
+        ),
+        migrations.RunPython(store_buffers_uncompressed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0002_dashboard_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboarddata',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the canonical JSON encoding of the data', max_length=64),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0003_dashboarddata_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboarddata',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False, help_text='Incremented on every change of the data'),
+        ),
+        migrations.CreateModel(
+            name='DashboardDataChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField()),
+                ('delta', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dashboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='dashboards.dashboarddata')),
+            ],
+            options={
+                'ordering': ('dashboard', 'version'),
+                'constraints': [models.UniqueConstraint(fields=('dashboard', 'version'), name='unique_dashboard_change')],
+            },
+        ),
+    ]
@@ -1,4 +1,11 @@
-from django.db import models
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from . import columnar, history
 
 
 class DashboardData(models.Model):
@@ -14,6 +21,11 @@ class DashboardData(models.Model):
         dashboard (str): Name of the dashboard the data relevant to.
         data_source (str): An optional URL string for the source data.
         data (json): Data needed for the corresponding dashboard (JSON format).
+        content_hash (str): SHA-256 of the canonical JSON encoding of `data`.
+        version (int): Incremented on every change of `data`, which is kept
+            as a delta in the change history (see `DashboardDataChange`).
+        columnar (bool): Whether tabular data is also stored as typed columns
+            (see `DashboardColumn`), allowing sliced reads.
         created_at (datetime): When dashboard data was created.
         updated_at (datetime): When dashboard data was last updated.
     """
@@ -27,6 +39,21 @@ class DashboardData(models.Model):
         max_length=150, blank=True, help_text="Optional: URL of source raw data"
     )
     data = models.JSONField(help_text="Data related to the dashboard in JSON format")
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of the canonical JSON encoding of the data",
+    )
+    version = models.PositiveBigIntegerField(
+        default=1,
+        editable=False,
+        help_text="Incremented on every change of the data",
+    )
+    columnar = models.BooleanField(
+        default=False,
+        help_text="Also store tabular data as typed columns for sliced reads",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -37,3 +64,174 @@ class DashboardData(models.Model):
     def __str__(self):
         """Return the dashboard name for string representation."""
         return self.dashboard
+
+    def clean(self):
+        """Validate that columnar data is tabular."""
+        if self.columnar:
+            try:
+                columnar.to_columns(self.data)
+            except ValueError as error:
+                raise ValidationError({"columnar": str(error)}) from error
+
+    def save(self, *args, **kwargs):
+        """Save the data, keeping its hash, version, history and columns in sync."""
+        self.content_hash = self.hash_data(self.data)
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                # Lock the row so concurrent saves get consecutive versions
+                previous = (
+                    DashboardData.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values("content_hash", "version", "columnar")
+                    .first()
+                )
+            changed = previous is not None and (
+                previous["content_hash"] != self.content_hash
+            )
+            if changed:
+                previous_data = (
+                    DashboardData.objects.filter(pk=self.pk)
+                    .values_list("data", flat=True)
+                    .get()
+                )
+                self.version = previous["version"] + 1
+            elif previous is not None:
+                self.version = previous["version"]
+            super().save(*args, **kwargs)
+            if changed:
+                self.record_change(previous_data)
+            # Columns only depend on the data: leave them alone unless it
+            # changed or the columnar encoding was just switched on or off
+            was_columnar = previous is not None and previous["columnar"]
+            if self.columnar and (changed or not was_columnar):
+                self.rebuild_columns()
+            elif was_columnar and not self.columnar:
+                self.columns.all().delete()
+
+    @staticmethod
+    def hash_data(data):
+        """Return the SHA-256 hex digest of the canonical JSON encoding of data."""
+        canonical = json.dumps(
+            data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def record_change(self, previous_data):
+        """Store the delta from the previous data as the change to `version`.
+
+        Changes older than the `DASHBOARD_HISTORY_LENGTH` latest ones are
+        pruned; clients holding an older version get the full document.
+        """
+        delta = history.diff(previous_data, self.data)
+        DashboardDataChange.objects.create(
+            dashboard=self,
+            version=self.version,
+            delta={"replace": self.data} if delta is None else delta,
+        )
+        self.changes.filter(
+            version__lte=self.version - settings.DASHBOARD_HISTORY_LENGTH
+        ).delete()
+
+    def rebuild_columns(self):
+        """Replace the typed columns with an encoding of the current data.
+
+        Returns:
+            list: Names of the columns skipped for lack of a supported type.
+
+        Raises:
+            ValueError: If the data is not tabular.
+        """
+        encoded, skipped = columnar.encode_table(self.data)
+        with transaction.atomic():
+            self.columns.all().delete()
+            DashboardColumn.objects.bulk_create(
+                DashboardColumn(dashboard=self, **column) for column in encoded
+            )
+        return skipped
+
+
+class DashboardColumn(models.Model):
+    """Typed column buffer of tabular dashboard data.
+
+    Each column of a columnar `DashboardData` is stored as a little-endian
+    buffer of fixed-size scalars (see `pages.dashboards.columnar`), so a row
+    range of a column can be read by byte offsets without loading the whole
+    dataset. The column at position 0 is the index column used for row
+    range lookups.
+
+    Attributes:
+        dashboard (DashboardData): Dashboard data the column belongs to.
+        name (str): Column name in the source data.
+        position (int): Position of the column in the source data.
+        dtype (str): NumPy dtype string describing the buffer layout.
+        length (int): Number of rows.
+        block_starts (list): Zone map of the index column, empty otherwise or
+            if the index column is not sorted.
+        buffer (bytes): The column values.
+    """
+
+    DTYPE_CHOICES = (
+        ("<f8", "float64"),
+        ("<i8", "int64"),
+        ("<M8[D]", "date"),
+        ("<M8[s]", "datetime"),
+    )
+
+    dashboard = models.ForeignKey(
+        DashboardData, on_delete=models.CASCADE, related_name="columns"
+    )
+    name = models.CharField(max_length=100)
+    position = models.PositiveSmallIntegerField()
+    dtype = models.CharField(max_length=8, choices=DTYPE_CHOICES)
+    length = models.PositiveIntegerField()
+    block_starts = models.JSONField(default=list, blank=True)
+    buffer = models.BinaryField()
+
+    class Meta:
+        ordering = ("dashboard", "position")
+        constraints = (
+            models.UniqueConstraint(
+                fields=["dashboard", "name"], name="unique_dashboard_column"
+            ),
+        )
+
+    def __str__(self):
+        """Return the dashboard and column names for string representation."""
+        return f"{self.dashboard_id}:{self.name}"
+
+
+class DashboardDataChange(models.Model):
+    """Change of dashboard data, stored as the delta from the previous version.
+
+    Deltas are computed by `pages.dashboards.history.diff()` and served by
+    the delta endpoint, so clients holding a recent version fetch only what
+    changed. Only the latest `DASHBOARD_HISTORY_LENGTH` changes of each
+    dashboard are kept.
+
+    Attributes:
+        dashboard (DashboardData): Dashboard data the change belongs to.
+        version (int): Version of the data after the change.
+        delta (json): Delta from the previous version (see
+            `pages.dashboards.history`).
+        created_at (datetime): When the change was made.
+    """
+
+    dashboard = models.ForeignKey(
+        DashboardData, on_delete=models.CASCADE, related_name="changes"
+    )
+    version = models.PositiveBigIntegerField()
+    delta = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("dashboard", "version")
+        constraints = (
+            models.UniqueConstraint(
+                fields=["dashboard", "version"], name="unique_dashboard_change"
+            ),
+        )
+
+    def __str__(self):
+        """Return the dashboard id and version for string representation."""
+        return f"{self.dashboard_id}:{self.version}"
@@ -0,0 +1,418 @@
+import io
+import json
+import random
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from utils import object_cache
+
+from . import aggregation, columnar, history
+from .management.commands import load_dashboard_data
+from .models import DashboardData
+
+
+def dates(*values):
+    return np.array([columnar.to_scalar("<M8[D]", value) for value in values])
+
+
+def floats(*values):
+    return np.array([columnar.to_scalar("<f8", value) for value in values])
+
+
+class BucketTests(SimpleTestCase):
+    """Rows are aggregated per calendar period, ignoring missing values."""
+
+    def setUp(self):
+        # The last row has no date, so it belongs to no period
+        self.index = dates(
+            "2024-01-30", "2024-01-31", "2024-02-01", "2024-02-04", "2024-02-05", None
+        )
+        self.columns = {
+            "cases": ("<i8", np.array([1, 2, 3, 4, 5, 100])),
+            "rate": ("<f8", floats(1.0, None, 3.0, None, 5.0, 100.0)),
+        }
+
+    def aggregate(self, period, aggregate):
+        keys, columns = aggregation.bucket(
+            "<M8[D]", self.index, self.columns, period, aggregate
+        )
+        return aggregation.to_json("<M8[D]", keys), {
+            name: aggregation.to_json(dtype, values)
+            for name, (dtype, values) in columns.items()
+        }
+
+    def test_day(self):
+        keys, columns = self.aggregate("day", "sum")
+        self.assertEqual(
+            keys,
+            ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-04", "2024-02-05"],
+        )
+        self.assertEqual(columns["cases"], [1, 2, 3, 4, 5])
+        # A period without values is missing, not zero
+        self.assertEqual(columns["rate"], [1.0, None, 3.0, None, 5.0])
+
+    def test_week(self):
+        # Weeks start on Monday: 2024-01-29 and 2024-02-05
+        keys, columns = self.aggregate("week", "sum")
+        self.assertEqual(keys, ["2024-01-29", "2024-02-05"])
+        self.assertEqual(columns["cases"], [10, 5])
+        self.assertEqual(columns["rate"], [4.0, 5.0])
+
+    def test_month(self):
+        keys, columns = self.aggregate("month", "mean")
+        self.assertEqual(keys, ["2024-01-01", "2024-02-01"])
+        self.assertEqual(columns["cases"], [1.5, 4.0])
+        self.assertEqual(columns["rate"], [1.0, 4.0])
+
+    def test_min_and_max(self):
+        _keys, columns = self.aggregate("month", "min")
+        self.assertEqual(columns, {"cases": [1, 3], "rate": [1.0, 3.0]})
+        _keys, columns = self.aggregate("month", "max")
+        self.assertEqual(columns, {"cases": [2, 5], "rate": [1.0, 5.0]})
+
+    def test_unsorted_rows(self):
+        order = [4, 2, 0, 5, 3, 1]
+        keys, columns = aggregation.bucket(
+            "<M8[D]",
+            self.index[order],
+            {
+                name: (dtype, values[order])
+                for name, (dtype, values) in self.columns.items()
+            },
+            "week",
+            "sum",
+        )
+        self.assertEqual(
+            aggregation.to_json("<M8[D]", keys), ["2024-01-29", "2024-02-05"]
+        )
+        self.assertEqual(columns["cases"][1].tolist(), [10, 5])
+
+    def test_hours_of_datetimes(self):
+        index = np.array(
+            [
+                columnar.to_scalar("<M8[s]", value)
+                for value in (
+                    "2024-01-01T10:15:00",
+                    "2024-01-01T10:45:00",
+                    "2024-01-01T11:00:00",
+                )
+            ]
+        )
+        keys, columns = aggregation.bucket(
+            "<M8[s]", index, {"cases": ("<i8", np.array([1, 2, 4]))}, "hour", "sum"
+        )
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(columns["cases"][1].tolist(), [3, 4])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.aggregate("fortnight", "sum")
+        with self.assertRaises(ValueError):
+            self.aggregate("day", "median")
+        with self.assertRaises(ValueError):
+            # Dates have no hours
+            self.aggregate("hour", "sum")
+        with self.assertRaises(ValueError):
+            aggregation.bucket("<f8", floats(1.0), {}, "day", "sum")
+
+
+class DownsampleTests(SimpleTestCase):
+    """LTTB keeps the requested number of rows and the shape of the series."""
+
+    def test_keeps_ends_and_peaks(self):
+        x = np.arange(100, dtype="<f8")
+        y = np.zeros(100)
+        y[37], y[71] = 50.0, -50.0
+        kept = aggregation.lttb(x, y, 10)
+
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 99)
+        self.assertIn(37, kept)
+        self.assertIn(71, kept)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_short_series_are_kept(self):
+        x = np.arange(5, dtype="<f8")
+        self.assertEqual(aggregation.lttb(x, x, 10).tolist(), [0, 1, 2, 3, 4])
+
+    def test_downsample_drops_missing_rows(self):
+        index = dates(*(f"2024-01-{day:02}" for day in range(1, 31)), None)
+        values = floats(*([1.0] * 14), None, 100.0, *([1.0] * 14), 5.0)
+        kept_index, columns = aggregation.downsample(
+            "<M8[D]", index, {"rate": ("<f8", values)}, 5
+        )
+        rates = aggregation.to_json("<f8", columns["rate"][1])
+
+        self.assertEqual(len(kept_index), 5)
+        self.assertNotIn(None, rates)
+        self.assertIn(100.0, rates)
+        self.assertEqual(aggregation.to_json("<M8[D]", kept_index)[-1], "2024-01-30")
+
+    def test_too_few_points(self):
+        with self.assertRaises(ValueError):
+            aggregation.downsample("<M8[D]", dates("2024-01-01"), {}, 2)
+
+
+class HistoryTests(SimpleTestCase):
+    """Deltas are compact and turn the old document into the new one."""
+
+    def assertRoundTrip(self, old, new):
+        self.assertTrue(history.same(history.apply(old, history.diff(old, new)), new))
+
+    def test_equal_documents(self):
+        self.assertIsNone(history.diff({"a": [1, 2]}, {"a": [1, 2]}))
+
+    def test_appended_rows_are_a_splice(self):
+        old = {"rows": [{"day": 1}, {"day": 2}]}
+        new = {"rows": [{"day": 1}, {"day": 2}, {"day": 3}]}
+        self.assertEqual(
+            history.diff(old, new),
+            {"keys": {"rows": {"splice": [2, 0, [{"day": 3}]]}}},
+        )
+        self.assertRoundTrip(old, new)
+
+    def test_changed_middle_row(self):
+        old = [1, 2, 3, 2, 1]
+        new = [1, 2, 4, 2, 1]
+        self.assertEqual(history.diff(old, new), {"splice": [2, 1, [4]]})
+        self.assertRoundTrip(old, new)
+
+    def test_repeated_rows_do_not_overlap(self):
+        for old, new in (([1, 1], [1, 1, 1]), ([1, 1, 1], [1]), ([], [1])):
+            with self.subTest(old=old, new=new):
+                self.assertRoundTrip(old, new)
+
+    def test_keys(self):
+        old = {"title": "Cases", "unit": "count", "rows": []}
+        new = {"title": "Weekly cases", "rows": [], "source": "Agency"}
+        self.assertEqual(
+            history.diff(old, new),
+            {
+                "keys": {
+                    "title": {"replace": "Weekly cases"},
+                    "source": {"replace": "Agency"},
+                },
+                "remove": ["unit"],
+            },
+        )
+        self.assertRoundTrip(old, new)
+
+    def test_types_are_compared(self):
+        for old, new in ((1, 1.0), (1, True), (0, False), ([1], [1.0])):
+            with self.subTest(old=old, new=new):
+                self.assertFalse(history.same(old, new))
+                self.assertIsNotNone(history.diff(old, new))
+                self.assertRoundTrip(old, new)
+        self.assertEqual(
+            history.diff({"cases": [3, 4]}, {"cases": [3.0, 4]}),
+            {"keys": {"cases": {"splice": [0, 1, [3.0]]}}},
+        )
+
+    def test_random_documents(self):
+        generator = random.Random(0)
+        values = [0, 1, 1.0, True, False, None, "a", [], {}]
+
+        def document(depth=0):
+            if depth < 3 and generator.random() < 0.4:
+                if generator.random() < 0.5:
+                    return [document(depth + 1) for _ in range(generator.randrange(5))]
+                return {
+                    generator.choice("abcd"): document(depth + 1)
+                    for _ in range(generator.randrange(4))
+                }
+            return generator.choice(values)
+
+        for _ in range(500):
+            self.assertRoundTrip(document(), document())
+
+
+class ReadJsonTests(SimpleTestCase):
+    """Top-level arrays are decoded item by item, whatever the chunk edges."""
+
+    items = (
+        '[{"day": "2024-01-01", "cases": 12345, "rate": 1.5e-3, "note": "a, ]"},'
+        ' -0.25, 1234567890, "x", [1, [2, {}]], true, null, "\\\\", "\\"]\\\\"]'
+    )
+
+    def test_every_chunk_size(self):
+        expected = json.loads(self.items)
+        for size in range(1, len(self.items) + 2):
+            with (
+                self.subTest(size=size),
+                mock.patch.object(load_dashboard_data, "CHUNK_SIZE", size),
+            ):
+                items = load_dashboard_data._iter_json_array(io.StringIO(self.items))
+                self.assertEqual(list(items), expected)
+
+    def test_whitespace(self):
+        for text in (" \n [ ] ", "[\n1 ,\n2\n]\n", "\n" * 10 + "[1]"):
+            with (
+                self.subTest(text=text),
+                mock.patch.object(load_dashboard_data, "CHUNK_SIZE", 3),
+            ):
+                items = load_dashboard_data._iter_json_array(io.StringIO(text))
+                self.assertEqual(list(items), json.loads(text))
+
+    def test_invalid_arrays(self):
+        for text in (
+            "[1, 2",
+            "[1, {",
+            "[1, nope]",
+            "[,1]",
+            "[1,,2]",
+            "[1,]",
+            "[1 2]",
+            "[1}",
+            '{"a": 1}',
+            "  ",
+        ):
+            with (
+                self.subTest(text=text),
+                self.assertRaises(ValueError),
+                mock.patch.object(load_dashboard_data, "CHUNK_SIZE", 2),
+            ):
+                list(load_dashboard_data._iter_json_array(io.StringIO(text)))
+
+    def test_read_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "cases.json"
+            for text in (self.items, '{"rows": [1, 2]}', "  42"):
+                with self.subTest(text=text):
+                    path.write_text(text, encoding="utf-8")
+                    self.assertEqual(
+                        load_dashboard_data.read_json(path), json.loads(text)
+                    )
+
+
+class LoadDashboardDataTests(TestCase):
+    """Files are loaded one at a time into the dashboard named after them."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def load(self, **files):
+        for name, data in files.items():
+            (self.directory / f"{name}.json").write_text(json.dumps(data))
+        output = io.StringIO()
+        call_command("load_dashboard_data", self.directory, stdout=output)
+        return output.getvalue()
+
+    def test_created_updated_and_unchanged(self):
+        output = self.load(cases=[{"day": "2024-01-01", "cases": 1}], tests=[1])
+        self.assertIn("2 created, 0 updated, 0 unchanged", output)
+
+        output = self.load(cases=[{"day": "2024-01-01", "cases": 2}])
+        self.assertIn("0 created, 1 updated, 1 unchanged", output)
+        dashboard = DashboardData.objects.get(dashboard="cases")
+        self.assertEqual(dashboard.version, 2)
+        self.assertEqual(dashboard.data, [{"day": "2024-01-01", "cases": 2}])
+        self.assertEqual(dashboard.changes.get().version, 2)
+
+    def test_columnar_dashboard_with_non_tabular_data(self):
+        DashboardData(
+            dashboard="cases", data=[{"day": "2024-01-01", "cases": 1}], columnar=True
+        ).save()
+        with self.assertRaisesMessage(CommandError, "cases.json"):
+            self.load(cases={"not": "tabular"})
+        dashboard = DashboardData.objects.get(dashboard="cases")
+        self.assertEqual(dashboard.version, 1)
+        self.assertTrue(dashboard.columns.exists())
+
+
+class DashboardColumnsTests(TestCase):
+    """Columns are rebuilt only when the data or the encoding changes."""
+
+    def setUp(self):
+        self.dashboard = DashboardData(
+            dashboard="cases", data=[{"day": "2024-01-01", "cases": 1}], columnar=True
+        )
+        self.dashboard.save()
+
+    def column_ids(self):
+        return set(self.dashboard.columns.values_list("pk", flat=True))
+
+    def test_unchanged_data_keeps_columns(self):
+        ids = self.column_ids()
+        self.assertTrue(ids)
+        self.dashboard.save()
+        self.assertEqual(self.column_ids(), ids)
+
+    def test_changed_data_rebuilds_columns(self):
+        ids = self.column_ids()
+        self.dashboard.data = [{"day": "2024-01-01", "cases": 2}]
+        self.dashboard.save()
+        self.assertTrue(self.column_ids())
+        self.assertFalse(self.column_ids() & ids)
+
+    def test_switching_the_encoding(self):
+        self.dashboard.columnar = False
+        self.dashboard.save()
+        self.assertFalse(self.column_ids())
+
+        self.dashboard.columnar = True
+        self.dashboard.save()
+        self.assertTrue(self.column_ids())
+
+
+class DashboardColumnsViewTests(TestCase):
+    """Reduced columns are cached once per normalized query."""
+
+    def setUp(self):
+        caches[object_cache.CACHE_ALIAS].clear()
+        DashboardData(
+            dashboard="cases",
+            data=[
+                {"day": f"2024-01-{day:02}", "cases": day, "tests": 2 * day}
+                for day in range(1, 31)
+            ],
+            columnar=True,
+        ).save()
+
+    def get(self, **query):
+        return self.client.get("/dashboards/cases/columns.json", query)
+
+    def test_equivalent_queries_share_the_result(self):
+        response = self.get(columns="cases", points="5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()["columns"]), ["day", "cases"])
+
+        objects = caches[object_cache.CACHE_ALIAS]
+        with mock.patch.object(objects, "set") as cache_set:
+            for query in (
+                {"columns": " cases,cases", "points": "5"},
+                {"columns": "cases", "points": "5", "from": ""},
+            ):
+                with self.subTest(query=query):
+                    response = self.get(**query)
+                    self.assertEqual(response.status_code, 200)
+        cache_set.assert_not_called()
+
+    def test_bounds(self):
+        response = self.get(
+            columns="cases",
+            bucket="week",
+            aggregate="sum",
+            **{
+                "from": "2024-01-08",
+                "to": "2024-01-14",
+            },
+        )
+        self.assertEqual(response.json()["columns"]["cases"], [sum(range(8, 15))])
+
+    def test_invalid_queries(self):
+        for query in (
+            {"columns": "deaths", "points": "5"},
+            {"from": "2024-1-8", "points": "5"},
+            {"to": "soon", "bucket": "week"},
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.get(**query).status_code, 400)
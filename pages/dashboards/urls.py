@@ -1,8 +1,16 @@
 from django.urls import path
-from .views import DashboardsIndex
+from .views import (
+    DashboardColumnsView,
+    DashboardDataView,
+    DashboardDeltaView,
+    DashboardsIndex,
+)
 
 app_name = "dashboards"
 
 urlpatterns = [
     path("", DashboardsIndex.as_view(), name="index"),
+    path("<str:name>/data.json", DashboardDataView.as_view(), name="data"),
+    path("<str:name>/delta.json", DashboardDeltaView.as_view(), name="delta"),
+    path("<str:name>/columns.json", DashboardColumnsView.as_view(), name="columns"),
 ]
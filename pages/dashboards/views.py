@@ -1,4 +1,17 @@
-from utils.views import BaseTemplateView
+import json
+
+from django.conf import settings
+from django.db.models import BinaryField, F, Func, TextField, Value
+from django.db.models.functions import Cast
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import urlencode
+from django.views import View
+
+from utils import object_cache
+from utils.views import BaseTemplateView, ConditionalGetMixin, ObjectCacheMixin
+
+from . import aggregation, columnar
+from .models import DashboardColumn, DashboardData, DashboardDataChange
 
 
 class DashboardsIndex(BaseTemplateView):
@@ -9,3 +22,470 @@ class DashboardsIndex(BaseTemplateView):
 
     template_name = "dashboards/index.html"
     title = "Data dashboards"
+    cache_timeout = 60 * 60
+    query_budget = 0
+
+
+class DashboardDataView(ConditionalGetMixin, ObjectCacheMixin, View):
+    """Serve the stored data of a dashboard as a streamed JSON document.
+
+    The JSON text is selected as-is from the database (cast to text, so the
+    ORM never decodes it into Python objects) and written to the response in
+    chunks, avoiding a `json.loads`/`json.dumps` round-trip per request.
+    Conditional GET requests are answered with 304 before the document is
+    fetched. The validators are kept in the object cache (see
+    `ObjectCacheMixin`), as are unknown dashboard names, but not the
+    documents, which can weigh several megabytes.
+
+    Attributes:
+        model: DashboardData model to serve.
+        chunk_size (int): Size in bytes of each streamed chunk.
+        query_budget (int): Maximum number of queries per request.
+        read_from_replica (bool): Read from the replica database if any.
+        public_route (bool): Served without sessions or cookies.
+    """
+
+    model = DashboardData
+    chunk_size = 64 * 1024
+    query_budget = 2
+    read_from_replica = True
+    public_route = True
+
+    def get(self, request, name):
+        """Stream the JSON data of the named dashboard."""
+        queryset = self.model.objects.filter(dashboard=name)
+
+        def fetch_updated_at():
+            updated_at = queryset.values_list("updated_at", flat=True).first()
+            return object_cache.MISSING if updated_at is None else updated_at
+
+        updated_at = self.cached("updated_at", fetch_updated_at)
+        if object_cache.is_missing(updated_at):
+            raise Http404(f"No data found for dashboard '{name}'")
+
+        response = self.conditional_response(request, updated_at, name)
+        if response is not None:
+            return response
+
+        row = (
+            queryset.annotate(document=Cast("data", TextField()))
+            .values_list("document", "updated_at")
+            .first()
+        )
+        if row is None:
+            raise Http404(f"No data found for dashboard '{name}'")
+
+        document, updated_at = row
+        content = document.encode()
+        # Refresh validators in case the data changed since the first query
+        self.conditional_response(request, updated_at, name)
+
+        response = StreamingHttpResponse(
+            self.iter_chunks(content), content_type="application/json"
+        )
+        response.headers["Content-Length"] = len(content)
+        return self.set_validators(response)
+
+    def iter_chunks(self, content):
+        """Yield the content in chunks without copying it."""
+        view = memoryview(content)
+        for start in range(0, len(view), self.chunk_size):
+            yield view[start : start + self.chunk_size]
+
+
+class DashboardDeltaView(ConditionalGetMixin, ObjectCacheMixin, View):
+    """Serve the changes of a dashboard's data since a version the client holds.
+
+    Every change of the data is kept as a delta from the previous version
+    (see `pages.dashboards.history`), so a client refreshing a dashboard
+    fetches only what changed, and applies the deltas in order:
+
+    ``{"version": 12, "since": 10, "full": false, "changes": [{"version": 11,
+    "delta": ...}, {"version": 12, "delta": ...}]}``
+
+    When the client's version is no longer in the bounded history (see
+    `DASHBOARD_HISTORY_LENGTH`), is unknown, or no version is given (first
+    load), the full document is returned instead, selected as stored like
+    the data endpoint does:
+
+    ``{"version": 12, "full": true, "data": ...}``
+
+    The changes since each version still in the history are kept in the
+    object cache per dashboard version; full documents are not cached.
+
+    Query parameters:
+        since: Version of the data the client holds.
+
+    Example:
+        ``/dashboards/wastewater/delta.json?since=10``
+    """
+
+    model = DashboardData
+    # Dashboard, its changes and its document if a change was pruned
+    query_budget = 3
+    read_from_replica = True
+    public_route = True
+
+    def get(self, request, name):
+        """Return the changes of the named dashboard since the client's version."""
+        since = request.GET.get("since", "0")
+        if not since.isdigit():
+            return JsonResponse({"error": "'since' must be a version"}, status=400)
+        since = int(since)
+
+        def fetch_dashboard():
+            dashboard = (
+                self.model.objects.filter(dashboard=name)
+                .only("pk", "updated_at", "version")
+                .first()
+            )
+            return object_cache.MISSING if dashboard is None else dashboard
+
+        dashboard = self.cached("dashboard", fetch_dashboard)
+        if object_cache.is_missing(dashboard):
+            raise Http404(f"No data found for dashboard '{name}'")
+
+        response = self.conditional_response(
+            request, dashboard.updated_at, name, dashboard.version
+        )
+        if response is not None:
+            return response
+
+        content = object_cache.MISSING
+        # Only versions still in the history, which bounds the cached entries
+        if self.has_changes_since(dashboard, since):
+            content = self.cached(
+                f"changes:{dashboard.version}:{since}",
+                lambda: self.read_changes(dashboard, since),
+            )
+        if object_cache.is_missing(content):
+            content = self.read_document(dashboard)
+        response = HttpResponse(content, content_type="application/json")
+        return self.set_validators(response)
+
+    def has_changes_since(self, dashboard, since):
+        """Return True if the changes since a version may all be in the history."""
+        oldest = dashboard.version - settings.DASHBOARD_HISTORY_LENGTH
+        return 0 < since <= dashboard.version and since >= oldest
+
+    def read_changes(self, dashboard, since):
+        """Return the JSON changes since a version, MISSING if one was pruned."""
+        changes = [
+            {"version": version, "delta": delta}
+            for version, delta in DashboardDataChange.objects.filter(
+                dashboard_id=dashboard.pk,
+                version__gt=since,
+                version__lte=dashboard.version,
+            )
+            .order_by("version")
+            .values_list("version", "delta")
+        ]
+        if len(changes) != dashboard.version - since:
+            return object_cache.MISSING
+        payload = {
+            "version": dashboard.version,
+            "since": since,
+            "full": False,
+            "changes": changes,
+        }
+        return json.dumps(payload).encode()
+
+    def read_document(self, dashboard):
+        """Return the JSON full document, with its version."""
+        document, version = (
+            self.model.objects.filter(pk=dashboard.pk)
+            .annotate(document=Cast("data", TextField()))
+            .values_list("document", "version")
+            .get()
+        )
+        return b'{"version": %d, "full": true, "data": %s}' % (
+            version,
+            document.encode(),
+        )
+
+
+class DashboardColumnsView(ConditionalGetMixin, ObjectCacheMixin, View):
+    """Serve a slice of the typed columns of a columnar dashboard as JSON.
+
+    Only the bytes of the requested rows of the requested columns are read
+    from the database. Row bounds are located on the index column (the first
+    column) with its zone map, reading at most one block per bound.
+
+    Long series can be reduced for charts (see `pages.dashboards.aggregation`)
+    by aggregating the rows per calendar period (`bucket`) and/or keeping a
+    given number of points (`points`). Reduced results are kept in the object
+    cache per dashboard content hash and normalized query (known column
+    names and parsed index bounds), as are the dashboard lookup and its
+    column metadata, so repeated chart loads make no query.
+
+    Query parameters:
+        columns: Comma-separated column names. Defaults to all columns.
+        from: Inclusive lower bound on the index column (e.g. 2024-01-01).
+        to: Inclusive upper bound on the index column.
+        bucket: Calendar period to aggregate the rows by (hour, day, week,
+            month or year), for a date or datetime index column.
+        aggregate: Aggregate of each period: mean (default), min, max or sum.
+        points: Number of points to downsample to with LTTB, chosen on the
+            first selected value column (after bucketing, if any).
+
+    Example:
+        ``/dashboards/wastewater/columns.json?columns=date,value&from=2024-01-01``
+        ``/dashboards/wastewater/columns.json?columns=value&bucket=week&points=800``
+    """
+
+    model = DashboardData
+    # Dashboard, columns, one block per row bound and the selected rows
+    query_budget = 5
+    read_from_replica = True
+    public_route = True
+    # Upper bound of `points`, bounding the work of a reduction
+    max_points = 10000
+
+    def get(self, request, name):
+        """Return the requested columns and rows of the named dashboard."""
+
+        def fetch_dashboard():
+            dashboard = (
+                self.model.objects.filter(dashboard=name, columnar=True)
+                .only("pk", "updated_at", "content_hash")
+                .first()
+            )
+            return object_cache.MISSING if dashboard is None else dashboard
+
+        dashboard = self.cached("dashboard", fetch_dashboard)
+        if object_cache.is_missing(dashboard):
+            raise Http404(f"No columnar data found for dashboard '{name}'")
+
+        response = self.conditional_response(request, dashboard.updated_at, name)
+        if response is not None:
+            return response
+
+        columns = self.get_columns(dashboard)
+        try:
+            reduction = self.get_reduction(columns, request.GET)
+            if reduction is None:
+                payload = self.read_payload(columns, request.GET)
+                response = JsonResponse(payload)
+            else:
+                entry = f"reduced:{dashboard.content_hash}:{urlencode(reduction)}"
+                content = self.cached(
+                    entry, lambda: self.read_reduced(columns, reduction)
+                )
+                response = HttpResponse(content, content_type="application/json")
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+        return self.set_validators(response)
+
+    def get_columns(self, dashboard):
+        """Return the columns of the dashboard, without their buffers.
+
+        Raises:
+            Http404: If the dashboard has no columns.
+        """
+        columns = self.cached(
+            f"columns:{dashboard.content_hash}",
+            lambda: list(dashboard.columns.defer("buffer")),
+        )
+        if not columns:
+            raise Http404(f"No columnar data found for dashboard '{dashboard}'")
+        return columns
+
+    def get_reduction(self, columns, query):
+        """Return the normalized reduction parameters, or None if not reduced.
+
+        Columns are resolved to their names and bounds to index scalars, so
+        that equivalent queries share their cached result.
+
+        Raises:
+            ValueError: If a parameter is invalid.
+        """
+        period, points = query.get("bucket"), query.get("points")
+        if period is None and points is None:
+            return None
+
+        aggregate = query.get("aggregate", "mean") if period else ""
+        if period and period not in aggregation.BUCKETS:
+            raise ValueError(
+                f"Unknown bucket '{period}', use one of {', '.join(aggregation.BUCKETS)}"
+            )
+        if aggregate and aggregate not in aggregation.AGGREGATES:
+            raise ValueError(
+                f"Unknown aggregate '{aggregate}', "
+                f"use one of {', '.join(aggregation.AGGREGATES)}"
+            )
+        if points:
+            try:
+                points = int(points)
+            except ValueError:
+                raise ValueError("points must be an integer") from None
+            if not 3 <= points <= self.max_points:
+                raise ValueError(f"points must be between 3 and {self.max_points}")
+        names = ""
+        if query.get("columns"):
+            selected = self.select_columns(columns, query["columns"])
+            names = ",".join(dict.fromkeys(column.name for column in selected))
+        lower, upper = self.get_bounds(columns[0], query)
+        return {
+            "columns": names,
+            "from": "" if lower is None else lower,
+            "to": "" if upper is None else upper,
+            "bucket": period or "",
+            "aggregate": aggregate,
+            "points": points or "",
+        }
+
+    def get_bounds(self, index, query):
+        """Return the `from` and `to` bounds as index column scalars, or None if unset.
+
+        Raises:
+            ValueError: If a bound is not a value of the index column type.
+        """
+        return tuple(
+            columnar.to_scalar(index.dtype, query[param]) if query.get(param) else None
+            for param in ("from", "to")
+        )
+
+    def read_columns(self, columns, names, lower, upper, with_index=False):
+        """Return the index column, the selected columns, the row range and buffers.
+
+        The index column is selected first if `with_index` is True. Bounds
+        are index column scalars (see `get_bounds`).
+
+        Raises:
+            ValueError: If a column is unknown or the bounds are invalid.
+        """
+        selected = self.select_columns(columns, names)
+        if with_index:
+            selected = [columns[0], *(c for c in selected if c.pk != columns[0].pk)]
+        # Bisects the index column, reading its blocks on demand
+        start, stop = self.locate_rows(columns[0], lower, upper)
+        buffers = self.read_rows(selected, start, stop)
+        return columns[0], selected, start, stop, buffers
+
+    def read_payload(self, columns, query):
+        """Return the requested rows of the requested columns."""
+        index, selected, start, stop, buffers = self.read_columns(
+            columns, query.get("columns"), *self.get_bounds(columns[0], query)
+        )
+        return {
+            "index": index.name,
+            "start": start,
+            "stop": stop,
+            "columns": {
+                column.name: columnar.decode(column.dtype, buffers[column.pk])
+                for column in selected
+            },
+        }
+
+    def read_reduced(self, columns, reduction):
+        """Return the JSON document of the reduced rows of the requested columns.
+
+        The index column is always included, first.
+        """
+        index, selected, start, stop, buffers = self.read_columns(
+            columns,
+            reduction["columns"] or None,
+            None if reduction["from"] == "" else reduction["from"],
+            None if reduction["to"] == "" else reduction["to"],
+            with_index=True,
+        )
+        index_values = aggregation.to_array(index.dtype, buffers[index.pk])
+        values = {
+            column.name: (
+                column.dtype,
+                aggregation.to_array(column.dtype, buffers[column.pk]),
+            )
+            for column in selected
+            if column.pk != index.pk
+        }
+        columns = self.reduce(index, index_values, values, reduction)
+        payload = {
+            "index": index.name,
+            "start": start,
+            "stop": stop,
+            "bucket": reduction["bucket"] or None,
+            "aggregate": reduction["aggregate"] or None,
+            "points": reduction["points"] or None,
+            "columns": columns,
+        }
+        return json.dumps(payload).encode()
+
+    def reduce(self, index, index_values, values, reduction):
+        """Bucket and/or downsample the columns, returning their JSON values."""
+        if reduction["bucket"]:
+            index_values, values = aggregation.bucket(
+                index.dtype,
+                index_values,
+                values,
+                reduction["bucket"],
+                reduction["aggregate"],
+            )
+        if reduction["points"]:
+            index_values, values = aggregation.downsample(
+                index.dtype, index_values, values, reduction["points"]
+            )
+        return {
+            index.name: aggregation.to_json(index.dtype, index_values),
+            **{
+                name: aggregation.to_json(dtype, array)
+                for name, (dtype, array) in values.items()
+            },
+        }
+
+    def select_columns(self, columns, names):
+        """Return the columns matching the comma-separated names, or all."""
+        if not names:
+            return columns
+
+        by_name = {column.name: column for column in columns}
+        names = [name.strip() for name in names.split(",") if name.strip()]
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+        return [by_name[name] for name in names]
+
+    def locate_rows(self, index, lower, upper):
+        """Return the row range matching the inclusive index column scalars."""
+        start, stop = 0, index.length
+        if lower is None and upper is None:
+            return start, stop
+        if not index.block_starts:
+            raise ValueError(f"Index column '{index.name}' is not sorted")
+
+        def read_block(block_start, block_stop):
+            return self.read_rows([index], block_start, block_stop)[index.pk]
+
+        if lower is not None:
+            start = columnar.locate(index, lower, read_block)
+        if upper is not None:
+            stop = columnar.locate(index, upper, read_block, right=True)
+        return start, max(start, stop)
+
+    def read_rows(self, columns, start, stop):
+        """Return the buffers of a row range of the columns, keyed by pk."""
+        buffers = {column.pk: b"" for column in columns}
+        for pk, buffer in self.get_rows_queryset(columns, start, stop):
+            buffers[pk] = bytes(buffer)
+        return buffers
+
+    def get_rows_queryset(self, columns, start, stop):
+        """Return (pk, buffer) pairs of a row range of the columns.
+
+        No query is made for an empty range.
+        """
+        length = (stop - start) * columnar.ITEMSIZE
+        if length <= 0:
+            return DashboardColumn.objects.none().values_list("pk", "buffer")
+
+        chunk = Func(
+            F("buffer"),
+            Value(start * columnar.ITEMSIZE + 1),
+            Value(length),
+            function="SUBSTR",
+            output_field=BinaryField(),
+        )
+        return (
+            DashboardColumn.objects.filter(pk__in=[column.pk for column in columns])
+            .annotate(chunk=chunk)
+            .values_list("pk", "chunk")
+        )
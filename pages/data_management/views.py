@@ -4,3 +4,5 @@ from utils.views import BaseTemplateView
 class  DataManagement(BaseTemplateView):
     template_name = "data_management/index.html"
     title = "Research Data Management"
+    cache_timeout = 60 * 60
+    query_budget = 0
@@ -4,3 +4,5 @@ from utils.views import BaseTemplateView
 class Home(BaseTemplateView):
     template_name = "home/index.html"
     title = "Swedish Pathogens Portal: supporting pandemic preparedness"
+    cache_timeout = 60 * 60
+    query_budget = 0
@@ -4,3 +4,5 @@ from utils.views import BaseTemplateView
 class Privacy(BaseTemplateView):
     template_name = "privacy/index.html"
     title = "Privacy Policy"
+    cache_timeout = 60 * 60
+    query_budget = 0
@@ -10,3 +10,14 @@ class TopicsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "pages.topics"
+
+    def ready(self):
+        """Invalidate the cached Topic objects when one changes."""
+        from django.db.models.signals import post_delete, post_save
+
+        from utils.object_cache import invalidate_on_change
+
+        from .models import Topic
+
+        post_save.connect(invalidate_on_change, sender=Topic)
+        post_delete.connect(invalidate_on_change, sender=Topic)
@@ -0,0 +1,117 @@
+"""Responsive derivatives of topic thumbnail images.
+
+Topic cards display thumbnails far below their original resolution, so
+each uploaded thumbnail gets resized derivatives in several widths and
+formats (offered to browsers through `srcset`) and a tiny blurred
+placeholder shown while the image loads.
+
+Derivative names contain a digest of the original image and of the
+derivative settings, so the same derivatives are shared (never rewritten)
+by topics with the same image, and topics with different images never
+overwrite each other's derivatives.
+"""
+
+import base64
+import hashlib
+import io
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageFilter, ImageOps
+
+# Widths (in pixels) of the generated derivatives, covering 1x and 2x displays
+THUMBNAIL_WIDTHS = [320, 480, 640, 960]
+
+# Derivative formats: extension mapped to Pillow save options
+THUMBNAIL_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+PLACEHOLDER_WIDTH = 16
+
+
+def _encode(image, options):
+    buffer = io.BytesIO()
+    if options["format"] == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def _placeholder(image):
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    data = _encode(tiny, {"format": "WEBP", "quality": 40})
+    return f"data:image/webp;base64,{base64.b64encode(data).decode()}"
+
+
+def _digest(data):
+    """Return a short digest of an image and of the derivative settings."""
+    digest = hashlib.sha256(data)
+    digest.update(repr((THUMBNAIL_WIDTHS, THUMBNAIL_FORMATS)).encode())
+    return digest.hexdigest()[:12]
+
+
+def build_thumbnails(name, storage=default_storage):
+    """Generate the derivatives and placeholder of a stored thumbnail image.
+
+    This only touches the storage, not the database, so it can run in
+    worker processes (see the `generate_topic_thumbnails` command).
+
+    Args:
+        name (str): Name of the original image in the storage.
+        storage: Storage holding the image and receiving the derivatives.
+
+    Returns:
+        dict: The original `width` and `height`, the `placeholder` data URI and
+        the `derivatives` ({"source": name, "<format>": [[width, name], ...]}).
+    """
+    with storage.open(name) as file:
+        data = file.read()
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    image.load()
+
+    path = PurePosixPath(name)
+    directory = path.parent / "derivatives"
+    digest = _digest(data)
+    widths = [width for width in THUMBNAIL_WIDTHS if width < image.width]
+    widths.append(min(image.width, THUMBNAIL_WIDTHS[-1]))
+
+    derivatives = {"source": name}
+    for extension, options in THUMBNAIL_FORMATS.items():
+        derivatives[extension] = []
+        for width in sorted(set(widths)):
+            derivative = str(directory / f"{path.stem}-{digest}-{width}w.{extension}")
+            # Same image and settings: the existing file is this derivative
+            if not storage.exists(derivative):
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                derivative = storage.save(
+                    derivative, ContentFile(_encode(resized, options))
+                )
+            derivatives[extension].append([width, derivative])
+
+    return {
+        "width": image.width,
+        "height": image.height,
+        "placeholder": _placeholder(image),
+        "derivatives": derivatives,
+    }
+
+
+def derivative_names(derivatives):
+    """Return the names of the derivative files listed in `derivatives`."""
+    return {
+        name
+        for extension in THUMBNAIL_FORMATS
+        for _width, name in derivatives.get(extension, [])
+    }
+
+
+def delete_thumbnails(derivatives, keep=(), storage=default_storage):
+    """Delete the derivative files listed in `derivatives`, except `keep`."""
+    for name in derivative_names(derivatives) - set(keep):
+        storage.delete(name)
@@ -0,0 +1,93 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from pages.topics.images import build_thumbnails
+from pages.topics.models import Topic
+from utils.db import close_connections
+
+
+class Command(BaseCommand):
+    """Generate responsive thumbnail derivatives and placeholders for topics.
+
+    Thumbnails are processed on save, so this is only needed for topics
+    created before derivatives existed or after a change of the derivative
+    settings (with `--all`). Images are resized in a pool of worker
+    processes; the database is only written from this process.
+
+    Missing or unreadable images fail the command once the others are
+    processed, unless `--keep-going` is given (as at container start, where
+    one bad image must not stop the site from starting).
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py generate_topic_thumbnails
+            python manage.py generate_topic_thumbnails --all --workers 4
+            python manage.py generate_topic_thumbnails --keep-going
+    """
+
+    help = "Generate responsive thumbnail derivatives for topics."
+
+    def add_arguments(self, parser):
+        """Add command line arguments and options."""
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate the derivatives of every topic, not only stale ones.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (default: number of CPUs).",
+        )
+        parser.add_argument(
+            "--keep-going",
+            action="store_true",
+            help="Only warn about images that could not be processed.",
+        )
+
+    def handle(self, *args, **options):
+        """Generate the missing (or all) derivatives and store them."""
+        topics = Topic.objects.exclude(thumbnail_image="")
+        if not options["all"]:
+            topics = [topic for topic in topics if topic.is_thumbnail_stale]
+        topics = {topic.thumbnail_image.name: topic for topic in topics}
+        if not topics:
+            self.stdout.write("No topic thumbnails to generate.")
+            return
+
+        # Forked workers must not share the parent's database connections
+        close_connections()
+
+        failed = []
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as executor:
+            futures = {
+                executor.submit(build_thumbnails, name): topic
+                for name, topic in topics.items()
+            }
+            for future in as_completed(futures):
+                topic = futures[future]
+                try:
+                    topic.apply_thumbnails(future.result())
+                except (OSError, ValueError, Image.DecompressionBombError) as error:
+                    failed.append(topic.slug)
+                    self.stderr.write(f"Failed to process '{topic.slug}': {error}")
+                else:
+                    self.stdout.write(f"Processed '{topic.slug}'")
+
+        if failed:
+            message = f"{len(failed)} topic thumbnail(s) failed."
+            if not options["keep_going"]:
+                raise CommandError(message)
+            self.stderr.write(self.style.WARNING(message))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated thumbnails for {len(topics) - len(failed)} topic(s)."
+            )
+        )
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from pages.topics.models import RENDERER_VERSION, Topic
+from utils import object_cache
+
+
+class Command(BaseCommand):
+    """Re-render the stored HTML of topics rendered by an outdated renderer.
+
+    Topics store the HTML rendered from their markdown content together with
+    the renderer version used. When the markdown configuration changes, every
+    row becomes stale; this command re-renders them in batches so that the
+    detail page never has to call the markdown engine.
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py rerender_topics
+            python manage.py rerender_topics --all --batch-size 50
+    """
+
+    help = "Re-render stored topic HTML produced by an outdated markdown renderer."
+
+    def add_arguments(self, parser):
+        """Add command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of topics rendered and written per batch (default: 100).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every topic, not only the stale ones.",
+        )
+
+    def handle(self, *args, **options):
+        """Re-render stale topics batch by batch."""
+        batch_size = options["batch_size"]
+        queryset = Topic.objects.order_by("pk")
+        if not options["all"]:
+            queryset = queryset.exclude(content_html_version=RENDERER_VERSION)
+
+        pks = list(queryset.values_list("pk", flat=True))
+        for start in range(0, len(pks), batch_size):
+            batch = Topic.objects.filter(pk__in=pks[start : start + batch_size])
+            topics = list(batch.only("pk", "content"))
+            now = timezone.now()
+            for topic in topics:
+                topic.render_content()
+                # The served HTML changes, so HTTP validators must change too
+                topic.updated_at = now
+
+            with transaction.atomic():
+                Topic.objects.bulk_update(
+                    topics,
+                    ["content_html", "content_html_version", "updated_at"],
+                    batch_size=batch_size,
+                )
+            # Bulk updates send no signals, drop the cached topics here
+            object_cache.invalidate(Topic)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-rendered {len(pks)} topic(s) with renderer {RENDERER_VERSION}."
+            )
+        )
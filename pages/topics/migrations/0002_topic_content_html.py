@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='HTML rendered from the markdown content (generated on save)'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='content_html_version',
+            field=models.CharField(blank=True, editable=False, help_text='Renderer version used to generate the rendered HTML', max_length=12),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0002_topic_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='thumbnail_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized versions of the thumbnail image (generated on save)'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='thumbnail_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Blurred placeholder of the thumbnail image (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='topic',
+            name='thumbnail_image',
+            field=models.ImageField(height_field='thumbnail_height', help_text='Thumbnail image for the topic card display', upload_to='topics/images/', width_field='thumbnail_width'),
+        ),
+    ]
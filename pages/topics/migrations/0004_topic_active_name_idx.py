@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0003_topic_thumbnail_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['is_active', 'name'], name='topic_active_name_idx'),
+        ),
+    ]
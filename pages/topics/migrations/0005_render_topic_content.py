@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+def render_topics(apps, schema_editor):
+    # Topics created before 0002 have no rendered HTML yet; render them once
+    # here so detail pages are not blank until `rerender_topics` runs.
+    from pages.topics.models import RENDERER_VERSION, render_markdown
+
+    Topic = apps.get_model('topics', 'Topic')
+    topics = Topic.objects.exclude(content_html_version=RENDERER_VERSION).only(
+        'content', 'content_html', 'content_html_version'
+    )
+    for topic in topics.iterator():
+        topic.content_html = render_markdown(topic.content)
+        topic.content_html_version = RENDERER_VERSION
+        topic.save(update_fields=['content_html', 'content_html_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('topics', '0004_topic_active_name_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_topics, migrations.RunPython.noop),
+    ]
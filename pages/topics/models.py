@@ -1,8 +1,44 @@
+import hashlib
+import json
+
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.safestring import mark_safe
 import markdown
 
+from utils import object_cache
+from utils.metrics import measure
+
+from .images import (
+    THUMBNAIL_FORMATS,
+    build_thumbnails,
+    delete_thumbnails,
+    derivative_names,
+)
+
+# Markdown renderer configuration for topic content. Any change here produces
+# a new RENDERER_VERSION, which marks previously rendered rows as stale so the
+# `rerender_topics` management command picks them up.
+MARKDOWN_EXTENSIONS = ["extra", "codehilite"]
+MARKDOWN_EXTENSION_CONFIGS = {}
+RENDERER_VERSION = hashlib.sha1(
+    json.dumps(
+        [markdown.__version__, MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS],
+        sort_keys=True,
+    ).encode()
+).hexdigest()[:12]
+
+
+def render_markdown(text):
+    """Render markdown text to HTML using the topic renderer configuration."""
+    with measure("markdown"):
+        return markdown.markdown(
+            text,
+            extensions=MARKDOWN_EXTENSIONS,
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        )
+
 
 class Topic(models.Model):
     """Topic model for categorizing portal content.
@@ -16,7 +52,15 @@ class Topic(models.Model):
         slug (str): URL-friendly version of name (auto-generated).
         description (str): Brief description for topic cards.
         content (str): Rich markdown content for detail pages.
+        content_html (str): HTML rendered from `content` when the topic is saved.
+        content_html_version (str): Renderer version used for `content_html`.
         thumbnail_image (ImageField): Thumbnail image for topic cards.
+        thumbnail_width (int): Width of the thumbnail image (auto-filled).
+        thumbnail_height (int): Height of the thumbnail image (auto-filled).
+        thumbnail_placeholder (str): Tiny blurred version of the thumbnail,
+            as a data URI, shown while the image loads.
+        thumbnail_derivatives (dict): Resized versions of the thumbnail per
+            format (see `pages.topics.images`), generated on save.
         alert_message (str, optional): Prominent alert message for topic page.
         is_active (bool): Whether topic is visible (default: True).
         created_at (datetime): When topic was created.
@@ -52,10 +96,36 @@ class Topic(models.Model):
     content = models.TextField(
         help_text="Rich text content in markdown format (displayed on topic detail page)"
     )
+    content_html = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="HTML rendered from the markdown content (generated on save)",
+    )
+    content_html_version = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        help_text="Renderer version used to generate the rendered HTML",
+    )
     thumbnail_image = models.ImageField(
         upload_to="topics/images/",
+        width_field="thumbnail_width",
+        height_field="thumbnail_height",
         help_text="Thumbnail image for the topic card display",
     )
+    thumbnail_width = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Blurred placeholder of the thumbnail image (data URI)",
+    )
+    thumbnail_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized versions of the thumbnail image (generated on save)",
+    )
     alert_message = models.TextField(
         blank=True,
         null=True,
@@ -69,6 +139,10 @@ class Topic(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = (
+            # Active topic list, ordered by name (see TopicListView)
+            models.Index(fields=["is_active", "name"], name="topic_active_name_idx"),
+        )
         verbose_name = "Topic"
         verbose_name_plural = "Topics"
 
@@ -77,11 +151,87 @@ class Topic(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        """Save the topic, auto-generating slug if not provided."""
+        """Save the topic, auto-generating slug and rendering markdown content."""
         if not self.slug:
             self.slug = slugify(self.name)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "content_html",
+                    "content_html_version",
+                }
+
         super().save(*args, **kwargs)
 
+        if self.is_thumbnail_stale:
+            self.apply_thumbnails(build_thumbnails(self.thumbnail_image.name))
+
+    def render_content(self):
+        """Render `content` into `content_html` and stamp the renderer version."""
+        self.content_html = render_markdown(self.content)
+        self.content_html_version = RENDERER_VERSION
+
+    @property
+    def is_render_stale(self):
+        """Return True if `content_html` was produced by another renderer version."""
+        return self.content_html_version != RENDERER_VERSION
+
+    @property
+    def is_thumbnail_stale(self):
+        """Return True if the derivatives were not generated from the thumbnail."""
+        return bool(self.thumbnail_image) and (
+            self.thumbnail_derivatives.get("source") != self.thumbnail_image.name
+        )
+
+    def apply_thumbnails(self, thumbnails):
+        """Store generated thumbnails (see `build_thumbnails`) and clean up.
+
+        Derivatives of a previous thumbnail image are deleted, unless another
+        topic uses them too. The database row is updated directly, without
+        sending signals.
+        """
+        derivatives = thumbnails["derivatives"]
+        keep = derivative_names(derivatives)
+        if derivative_names(self.thumbnail_derivatives) - keep:
+            for other in (
+                type(self)
+                .objects.exclude(pk=self.pk)
+                .values_list("thumbnail_derivatives", flat=True)
+            ):
+                keep |= derivative_names(other)
+            delete_thumbnails(self.thumbnail_derivatives, keep=keep)
+
+        self.thumbnail_width = thumbnails["width"]
+        self.thumbnail_height = thumbnails["height"]
+        self.thumbnail_placeholder = thumbnails["placeholder"]
+        self.thumbnail_derivatives = derivatives
+        # The served HTML changes, so HTTP validators must change too
+        self.updated_at = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(
+            thumbnail_width=self.thumbnail_width,
+            thumbnail_height=self.thumbnail_height,
+            thumbnail_placeholder=self.thumbnail_placeholder,
+            thumbnail_derivatives=self.thumbnail_derivatives,
+            updated_at=self.updated_at,
+        )
+        object_cache.invalidate(type(self))
+
+    @property
+    def thumbnail_srcsets(self):
+        """Return the `srcset` attribute value of the derivatives per format."""
+        storage = self.thumbnail_image.storage
+        return {
+            extension: ", ".join(
+                f"{storage.url(name)} {width}w"
+                for width, name in self.thumbnail_derivatives.get(extension, [])
+            )
+            for extension in THUMBNAIL_FORMATS
+        }
+
     @property
     def display_image(self):
         """Return the URL of the thumbnail image."""
@@ -89,7 +239,11 @@ class Topic(models.Model):
 
     @property
     def rendered_content(self):
-        """Return content rendered as HTML from markdown."""
-        return mark_safe(
-            markdown.markdown(self.content, extensions=["extra", "codehilite"])
-        )
+        """Return the stored HTML rendered from markdown at save time.
+
+        Rows that were never rendered are rendered on the fly, so their page is
+        not blank before the next save or `rerender_topics` run.
+        """
+        if not self.content_html and self.content:
+            return mark_safe(render_markdown(self.content))
+        return mark_safe(self.content_html)
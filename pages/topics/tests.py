@@ -0,0 +1,108 @@
+import importlib
+import io
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .images import derivative_names
+from .models import RENDERER_VERSION, Topic
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(name, color, image_format):
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    """Every topic keeps serving the derivatives of its own thumbnail."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def create_topic(self, name, image):
+        topic = Topic(name=name, description="Description", content="Content")
+        topic.thumbnail_image = image
+        topic.save()
+        return topic
+
+    def assertDerivativesExist(self, topic):
+        names = derivative_names(topic.thumbnail_derivatives)
+        self.assertTrue(names)
+        for name in names:
+            self.assertTrue(default_storage.exists(name), name)
+
+    def test_images_with_the_same_stem(self):
+        red = self.create_topic("Red", image_file("covid.jpg", "red", "JPEG"))
+        blue = self.create_topic("Blue", image_file("covid.png", "blue", "PNG"))
+
+        self.assertFalse(
+            derivative_names(red.thumbnail_derivatives)
+            & derivative_names(blue.thumbnail_derivatives)
+        )
+        self.assertDerivativesExist(red)
+        self.assertDerivativesExist(blue)
+
+    def test_shared_derivatives_are_kept(self):
+        first = self.create_topic("First", image_file("same.jpg", "green", "JPEG"))
+        second = self.create_topic("Second", image_file("same.jpg", "green", "JPEG"))
+        shared = derivative_names(second.thumbnail_derivatives)
+
+        # The first topic changes its image: the derivatives of the old one
+        # are still used by the second topic
+        first.thumbnail_image = image_file("other.jpg", "white", "JPEG")
+        first.save()
+
+        self.assertDerivativesExist(first)
+        self.assertDerivativesExist(second)
+        self.assertEqual(derivative_names(second.thumbnail_derivatives), shared)
+
+    def test_missing_images(self):
+        topic = self.create_topic("Topic", image_file("gone.jpg", "red", "JPEG"))
+        Topic.objects.filter(pk=topic.pk).update(
+            thumbnail_image="topics/images/missing.jpg"
+        )
+        options = {"workers": 1, "stdout": io.StringIO(), "stderr": io.StringIO()}
+
+        with self.assertRaises(CommandError):
+            call_command("generate_topic_thumbnails", **options)
+        call_command("generate_topic_thumbnails", keep_going=True, **options)
+        self.assertIn("1 topic thumbnail(s) failed", options["stderr"].getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenderedContentTests(TestCase):
+    """Topics saved before `content_html` existed still show their content."""
+
+    def setUp(self):
+        topic = Topic(name="Topic", description="Description", content="# Title")
+        topic.thumbnail_image = image_file("topic.jpg", "red", "JPEG")
+        topic.save()
+        Topic.objects.filter(pk=topic.pk).update(
+            content_html="", content_html_version=""
+        )
+        self.topic = Topic.objects.get(pk=topic.pk)
+
+    def test_rendered_on_the_fly(self):
+        self.assertIn("<h1>Title</h1>", self.topic.rendered_content)
+
+    def test_data_migration(self):
+        migration = importlib.import_module(
+            "pages.topics.migrations.0005_render_topic_content"
+        )
+        migration.render_topics(apps, None)
+
+        self.topic.refresh_from_db()
+        self.assertIn("<h1>Title</h1>", self.topic.content_html)
+        self.assertEqual(self.topic.content_html_version, RENDERER_VERSION)
@@ -14,6 +14,9 @@ class TopicListView(BaseListView):
         context_object_name: Name for topics in template context.
         title: Page title displayed in template.
         ordering: Field to sort topics by (alphabetical by name).
+        only_fields: Fields used by the topic cards (skips the content).
+        keyset_paginate_by: Number of topics per page.
+        query_budget: Maximum number of queries (validators and one page).
     """
 
     model = Topic
@@ -21,6 +24,18 @@ class TopicListView(BaseListView):
     context_object_name = "topics"
     title = "Topics"
     ordering = "name"  # Topics are sorted alphabetically by name
+    only_fields = (
+        "name",
+        "slug",
+        "description",
+        "thumbnail_image",
+        "thumbnail_width",
+        "thumbnail_height",
+        "thumbnail_placeholder",
+        "thumbnail_derivatives",
+    )
+    keyset_paginate_by = 24
+    query_budget = 2
 
 
 class TopicDetailView(BaseDetailView):
@@ -33,8 +48,10 @@ class TopicDetailView(BaseDetailView):
         model: Topic model to display.
         template_name: Template for rendering the detail view.
         context_object_name: Name for topic in template context.
+        query_budget: Maximum number of queries per request.
     """
 
     model = Topic
     template_name = "topics/topic_detail.html"
     context_object_name = "topic"
+    query_budget = 1
@@ -20,9 +20,19 @@ wait-for-it "${POSTGRES_HOST}:${POSTGRES_PORT}" -t 30
 # Prepare database and static files
 python manage.py migrate --noinput
 
+# Re-render topic HTML produced by an outdated markdown renderer (no-op if none)
+python manage.py rerender_topics
+
+# Generate missing topic thumbnail derivatives (no-op if none); images that
+# cannot be processed are only reported, so they do not stop the site
+python manage.py generate_topic_thumbnails --keep-going
+
 # If first arg looks like a flag, assume we want to run gunicorn
+# --preload: the master imports the app and runs its warm-up (see core/wsgi.py)
+# before forking workers, which share the loaded state copy-on-write
 if [ "${1:-}" = "" ] || [ "${1#-}" != "$1" ]; then
   set -- gunicorn core.wsgi:application \
+    --preload \
     --bind 0.0.0.0:8000 \
     --workers ${GUNICORN_WORKERS:-2} \
     --threads ${GUNICORN_THREADS:-4} \
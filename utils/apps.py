@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+
+
+class UtilsConfig(AppConfig):
+    """Configuration for the utils app.
+
+    Registers the shared template tags and management commands
+    of the utils package; it has no models.
+    """
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "utils"
+
+    def ready(self):
+        """Register the system checks and the pool saturation logging."""
+        from django.core.signals import request_finished
+
+        from . import checks  # noqa: F401
+        from .db import log_pool_saturation
+
+        request_finished.connect(log_pool_saturation)
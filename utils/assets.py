@@ -0,0 +1,190 @@
+"""Static asset optimization for Pathogens Portal.
+
+Functions used at `collectstatic` time (see `utils.storage`) to shrink the
+static files every page includes:
+
+- SVGs are minified: comments, doctype, editor metadata and attributes are
+  stripped, path data is rounded and embedded rasters are downscaled to
+  twice their displayed size and re-encoded.
+- Rasters are re-encoded (and downscaled if oversized) when this makes them
+  smaller, and get WebP/AVIF variants that templates can offer instead
+  (see the `image_set` template tag).
+"""
+
+import base64
+import functools
+import io
+import re
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from PIL import Image, features
+
+# Decimals kept in SVG path data (logos are displayed far below their size)
+SVG_PRECISION = 1
+
+# Rasters wider than this (in pixels) are downscaled
+RASTER_MAX_WIDTH = 2048
+
+# Variant formats, in order of preference, as (extension, mime type, options)
+VARIANT_FORMATS = [
+    ("avif", "image/avif", {"quality": 60}),
+    ("webp", "image/webp", {"quality": 80, "method": 6}),
+]
+
+RASTER_EXTENSIONS = {"jpg", "jpeg", "png"}
+
+_NUMBER = re.compile(r"-?\d*\.\d+(?:[eE][-+]?\d+)?")
+_EMBEDDED_RASTER = re.compile(r"<image\b[^>]*>")
+
+
+def _extension(name):
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def _format_number(match):
+    number = f"{float(match.group(0)):.{SVG_PRECISION}f}".rstrip("0").rstrip(".")
+    return "0" if number in ("", "-0") else number
+
+
+def _minify_path_data(match):
+    data = _NUMBER.sub(_format_number, match.group(2))
+    data = re.sub(r"\s+", " ", data)
+    data = re.sub(r"\s*([,a-zA-Z])\s*", r"\1", data).strip()
+    return f'{match.group(1)}="{data}"'
+
+
+def _encode_smallest(image, original):
+    """Return the smallest of the PNG/WebP encodings of image and original."""
+    candidates = [original]
+    for image_format, options in (("PNG", {"optimize": True}), ("WEBP", {})):
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, lossless=True, **options)
+        candidates.append(buffer.getvalue())
+    return min(candidates, key=len)
+
+
+def _shrink_embedded_raster(match):
+    tag = match.group(0)
+    width = re.search(r'\swidth="([\d.]+)', tag)
+    data = re.search(r'data:image/(?:png|jpeg);base64,([^"]+)', tag)
+    if width is None or data is None:
+        return tag
+
+    original = base64.b64decode(data.group(1))
+    image = Image.open(io.BytesIO(original))
+    max_width = int(float(width.group(1)) * 2)
+    if image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+
+    encoded = _encode_smallest(image, original)
+    if encoded is original:
+        return tag
+
+    mime = "image/png" if encoded.startswith(b"\x89PNG") else "image/webp"
+    uri = f"data:{mime};base64,{base64.b64encode(encoded).decode()}"
+    return tag[: data.start()] + uri + tag[data.end() :]
+
+
+def optimize_svg(content):
+    """Return the minified SVG content."""
+    text = content.decode("utf-8")
+    text = re.sub(
+        r"<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->", "", text, flags=re.DOTALL
+    )
+    text = re.sub(r"<metadata\b.*?</metadata>", "", text, flags=re.DOTALL)
+    text = re.sub(r"<(sodipodi|inkscape):\w+\b[^>]*?(/>|>.*?</\1:\w+>)", "", text)
+
+    # Editor data (e.g. diagrams.net `content`) and attributes with no effect
+    text = re.sub(
+        r'\s(?:content|enable-background|(?:inkscape|sodipodi):[\w-]+)="[^"]*"',
+        "",
+        text,
+    )
+    text = re.sub(r'\sxmlns:(?:inkscape|sodipodi|rdf|cc|dc)="[^"]*"', "", text)
+    text = re.sub(r'\sopacity="1(?:\.0*)?"', "", text)
+
+    text = re.sub(r'\b(d|points)="([^"]*)"', _minify_path_data, text)
+    text = _EMBEDDED_RASTER.sub(_shrink_embedded_raster, text)
+    text = re.sub(r">\s+<", "><", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.encode("utf-8")
+
+
+def _open_raster(content):
+    image = Image.open(io.BytesIO(content))
+    if image.width > RASTER_MAX_WIDTH:
+        height = round(image.height * RASTER_MAX_WIDTH / image.width)
+        image = image.resize((RASTER_MAX_WIDTH, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def optimize_raster(name, content):
+    """Return the re-encoded raster content, or None if it is not smaller."""
+    extension = _extension(name)
+    buffer = io.BytesIO()
+    if extension == "ico":
+        # Keep the sizes browsers actually request
+        image = Image.open(io.BytesIO(content))
+        image.save(buffer, "ICO", sizes=[(16, 16), (32, 32), (48, 48)])
+    elif extension in ("jpg", "jpeg"):
+        image = _open_raster(content)
+        image.save(buffer, "JPEG", quality=85, optimize=True, progressive=True)
+    elif extension == "png":
+        image = _open_raster(content)
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        return None
+
+    optimized = buffer.getvalue()
+    return optimized if len(optimized) < len(content) else None
+
+
+def raster_variants(name, content):
+    """Return the WebP/AVIF variants of a raster that are smaller than it.
+
+    Returns:
+        dict: Variant file names mapped to their content.
+    """
+    if _extension(name) not in RASTER_EXTENSIONS:
+        return {}
+
+    stem = name.rsplit(".", 1)[0]
+    image = _open_raster(content)
+    variants = {}
+    for extension, _mime, options in VARIANT_FORMATS:
+        if not features.check(extension):
+            continue
+        buffer = io.BytesIO()
+        image.save(buffer, extension.upper(), **options)
+        if buffer.tell() < len(content):
+            variants[f"{stem}.{extension}"] = buffer.getvalue()
+    return variants
+
+
+def optimize_asset(name, content):
+    """Return the optimized content of a static file, or None if unchanged."""
+    extension = _extension(name)
+    if extension == "svg":
+        optimized = optimize_svg(content)
+        return optimized if len(optimized) < len(content) else None
+    return optimize_raster(name, content)
+
+
+@functools.cache
+def get_image_variants(path):
+    """Return the collected (path, mime type) variants of a static image.
+
+    Variants only exist in the manifest written by `collectstatic`, so this
+    returns an empty tuple when static files are served from the sources.
+    """
+    manifest = getattr(staticfiles_storage, "hashed_files", None)
+    if not manifest:
+        return ()
+
+    stem = path.rsplit(".", 1)[0]
+    return tuple(
+        (f"{stem}.{extension}", mime)
+        for extension, mime, _options in VARIANT_FORMATS
+        if f"{stem}.{extension}" in manifest
+    )
@@ -0,0 +1,457 @@
+"""HTTP benchmark of the portal routes.
+
+Used by the `benchmark` and `benchmark_compare` management commands:
+
+- `seed()` adds topics and dashboards of realistic sizes to the configured
+  database. Every seeded row is prefixed with `SEED_PREFIX`, so seeding is
+  idempotent and `clear_seed()` removes exactly what was added. Seeded
+  topics are active, hence publicly listed: the `benchmark` command only
+  seeds with `DEBUG` or `--allow-seed`, and clears the seed afterwards.
+- `get_routes()` lists every named route of `core/urls.py` (except the
+  admin), filling URL arguments with seeded objects.
+- `run()` requests each route in-process (Django test client) or against a
+  running server (e.g. a local gunicorn) and returns per-route throughput,
+  latency percentiles and queries per request. Queries are read from the
+  `Server-Timing` header (see `utils.middleware`), so both modes report them
+  as long as the target runs with `DEBUG` (the header is only sent to staff
+  users otherwise).
+  Responses are mostly served from the page, render and object caches after
+  the warm-up; with `cold=True` the caches are cleared before every request,
+  so that queries (e.g. N+1 regressions) and rendering are measured.
+- `compare()` flags routes whose latency or query count regressed.
+
+Nothing requires network access: it runs on SQLite or a local PostgreSQL.
+"""
+
+import io
+import math
+import platform
+import random
+import re
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from PIL import Image
+
+from pages.dashboards.models import DashboardData
+from pages.topics.images import (
+    build_thumbnails,
+    delete_thumbnails,
+    derivative_names,
+)
+from pages.topics.models import RENDERER_VERSION, Topic, render_markdown
+from utils import object_cache
+
+SEED_PREFIX = "bench-"
+
+# URL namespaces and names not benchmarked
+SKIPPED_NAMESPACES = {"admin", "djdt", "django_browser_reload"}
+SKIPPED_NAMES = {"metrics"}
+
+# Default regression thresholds used by `compare()`
+LATENCY_THRESHOLD = 0.10  # relative increase of p95
+LATENCY_FLOOR_MS = 1.0  # absolute increase of p95 below which it is noise
+QUERIES_THRESHOLD = 0  # absolute increase of queries per request
+
+_QUERIES = re.compile(r'db;[^,]*desc="[^"(]*\((\d+) queries\)"')
+
+TOPIC_CONTENT = """## Overview
+
+{name} brings together datasets, tools and services used in pandemic
+preparedness research in Sweden. This section lists the main resources,
+how to access them and who to contact.
+
+| Resource | Type | Access |
+| -------- | ---- | ------ |
+{rows}
+
+### Example analysis
+
+```python
+import pandas as pd
+
+cases = pd.read_csv("cases.csv", parse_dates=["date"])
+weekly = cases.resample("W", on="date").sum()
+print(weekly.tail())
+```
+
+### Further reading
+
+{paragraphs}
+"""
+
+
+def _topic_content(index, rng):
+    rows = "\n".join(
+        f"| Resource {index}-{row} | {rng.choice(['Dataset', 'Tool', 'Service'])} "
+        f"| {rng.choice(['Open', 'Restricted', 'On request'])} |"
+        for row in range(12)
+    )
+    paragraph = (
+        "Surveillance data are collected from regional laboratories and "
+        "aggregated weekly. Methods and caveats are documented with each "
+        "release, and questions can be sent to the data centre. "
+    )
+    paragraphs = "\n\n".join(paragraph * rng.randint(2, 5) for _ in range(6))
+    return TOPIC_CONTENT.format(name=f"Topic {index}", rows=rows, paragraphs=paragraphs)
+
+
+def _dashboard_data(rows, rng):
+    start = date(2020, 1, 1)
+    return [
+        {
+            "date": (start + timedelta(days=day)).isoformat(),
+            "cases": rng.randint(0, 5000),
+            "tests": rng.randint(1000, 50000),
+            "positivity": round(rng.random(), 4),
+            "region": rng.choice(["Stockholm", "Skåne", "Västra Götaland"]),
+        }
+        for day in range(rows)
+    ]
+
+
+def _thumbnail():
+    """Store one seed thumbnail (and its derivatives), shared by all topics."""
+    name = f"topics/images/{SEED_PREFIX}thumbnail.jpg"
+    if not default_storage.exists(name):
+        buffer = io.BytesIO()
+        Image.effect_mandelbrot((1200, 800), (-2, -1.2, 1, 1.2), 100).convert(
+            "RGB"
+        ).save(buffer, "JPEG", quality=85)
+        name = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return name, build_thumbnails(name)
+
+
+def seed(topics=50, dashboards=5, dashboard_rows=2000, random_seed=0):
+    """Add the missing seed topics and dashboards.
+
+    Topics get a few KB of markdown (tables, code, paragraphs) and a shared
+    thumbnail; dashboards get `dashboard_rows` daily records, stored as
+    typed columns as well.
+
+    Returns:
+        tuple: The number of created topics and dashboards.
+    """
+    rng = random.Random(random_seed)
+    existing_topics = set(
+        Topic.objects.filter(slug__startswith=SEED_PREFIX).values_list(
+            "slug", flat=True
+        )
+    )
+    existing_dashboards = set(
+        DashboardData.objects.filter(dashboard__startswith=SEED_PREFIX).values_list(
+            "dashboard", flat=True
+        )
+    )
+
+    new_topics = []
+    thumbnail = None
+    for index in range(topics):
+        slug = f"{SEED_PREFIX}topic-{index:04}"
+        # Generated even if it exists, so the content does not depend on it
+        content = _topic_content(index, rng)
+        if slug in existing_topics:
+            continue
+        if thumbnail is None:
+            thumbnail = _thumbnail()
+        name, thumbnails = thumbnail
+        new_topics.append(
+            Topic(
+                name=f"{SEED_PREFIX}Topic {index:04}",
+                slug=slug,
+                description=(
+                    f"Datasets, tools and services related to topic {index}. " * 3
+                ),
+                content=content,
+                content_html=render_markdown(content),
+                content_html_version=RENDERER_VERSION,
+                thumbnail_image=name,
+                thumbnail_width=thumbnails["width"],
+                thumbnail_height=thumbnails["height"],
+                thumbnail_placeholder=thumbnails["placeholder"],
+                thumbnail_derivatives=thumbnails["derivatives"],
+            )
+        )
+
+    with transaction.atomic():
+        Topic.objects.bulk_create(new_topics)
+        object_cache.invalidate(Topic)
+        created_dashboards = 0
+        for index in range(dashboards):
+            data = _dashboard_data(dashboard_rows, rng)
+            name = f"{SEED_PREFIX}dashboard-{index:02}"
+            if name in existing_dashboards:
+                continue
+            # Saved one by one so that typed columns are built
+            DashboardData(dashboard=name, data=data, columnar=True).save()
+            created_dashboards += 1
+    return len(new_topics), created_dashboards
+
+
+def clear_seed():
+    """Delete every seeded topic and dashboard, and the seed thumbnail."""
+    topics = Topic.objects.filter(slug__startswith=SEED_PREFIX)
+    # All seeded topics share the same thumbnail
+    topic = topics.only("thumbnail_derivatives").first()
+    if topic is not None and topic.thumbnail_derivatives:
+        # Topics with the same image share its derivatives
+        others = Topic.objects.exclude(slug__startswith=SEED_PREFIX).values_list(
+            "thumbnail_derivatives", flat=True
+        )
+        keep = set().union(*map(derivative_names, others))
+        delete_thumbnails(topic.thumbnail_derivatives, keep=keep)
+        default_storage.delete(topic.thumbnail_derivatives["source"])
+    topics.delete()
+    DashboardData.objects.filter(dashboard__startswith=SEED_PREFIX).delete()
+
+
+def _iter_patterns(patterns, namespace=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f"{namespace}{pattern.namespace}:"
+            yield from _iter_patterns(pattern.url_patterns, prefix)
+        elif pattern.name and pattern.name not in SKIPPED_NAMES:
+            yield f"{namespace}{pattern.name}", pattern
+
+
+def get_routes():
+    """Return the benchmarked routes as a {URL name: path} dict.
+
+    URL arguments are filled with seeded objects: `slug` with a topic and
+    `name` with a dashboard. Routes with other arguments are skipped.
+    """
+    samples = {
+        "slug": Topic.objects.filter(slug__startswith=SEED_PREFIX, is_active=True)
+        .order_by("slug")
+        .values_list("slug", flat=True)
+        .first(),
+        "name": DashboardData.objects.filter(dashboard__startswith=SEED_PREFIX)
+        .order_by("dashboard")
+        .values_list("dashboard", flat=True)
+        .first(),
+    }
+
+    routes = {}
+    for name, pattern in _iter_patterns(get_resolver().url_patterns):
+        arguments = list(pattern.pattern.converters)
+        if any(samples.get(argument) is None for argument in arguments):
+            continue
+        kwargs = {argument: samples[argument] for argument in arguments}
+        routes[name] = reverse(name, kwargs=kwargs)
+    return routes
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _summarize(latencies, queries, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "queries": round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def _queries(server_timing):
+    if not server_timing:
+        return None
+    match = _QUERIES.search(server_timing)
+    # Without a "db" entry the request made no query
+    return int(match.group(1)) if match else 0
+
+
+class InProcessTarget:
+    """Requests sent through the Django test client, without networking."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        # Consume streaming responses so their generation is measured
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response.status_code, response.headers.get("Server-Timing")
+
+
+class HTTPTarget:
+    """Requests sent to a running server, e.g. a local gunicorn."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def get(self, path):
+        request = urllib.request.Request(
+            self.base_url + path, headers={"Accept-Encoding": "identity"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing")
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers.get("Server-Timing")
+
+
+def clear_caches():
+    """Empty every configured cache (pages, rendered views and objects).
+
+    Against a running server, only the caches it shares with this process
+    (e.g. file caches) are emptied, not its per-process memory caches.
+    """
+    for cache in caches.all():
+        cache.clear()
+
+
+def bench_route(target, path, requests=200, concurrency=1, warmup=5, cold=False):
+    """Request a path repeatedly and return its statistics.
+
+    With `cold`, the caches are cleared (untimed) before every request.
+    """
+    for _ in range(warmup):
+        target.get(path)
+
+    def timed_get(_index):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        status, server_timing = target.get(path)
+        return time.perf_counter() - start, status, _queries(server_timing)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed_get, range(requests)))
+    else:
+        results = [timed_get(index) for index in range(requests)]
+    elapsed = time.perf_counter() - start
+
+    return _summarize(
+        [latency for latency, _status, _queries in results],
+        [queries for _latency, _status, queries in results if queries is not None],
+        sum(1 for _latency, status, _queries in results if status >= 400),
+        elapsed,
+    )
+
+
+def run(
+    routes,
+    base_url=None,
+    requests=200,
+    concurrency=1,
+    warmup=5,
+    cold=False,
+    report=None,
+):
+    """Benchmark the routes and return the results as a JSON-serializable dict.
+
+    Args:
+        routes (dict): URL names mapped to paths (see `get_routes`).
+        base_url (str): URL of a running server, or None to run in-process.
+        requests (int): Measured requests per route.
+        concurrency (int): Concurrent requests (only against a server).
+        warmup (int): Unmeasured requests per route sent first.
+        cold (bool): Clear the caches before every measured request.
+        report (callable): Called with each route name and its statistics.
+    """
+    if base_url:
+        target = HTTPTarget(base_url)
+    else:
+        target = InProcessTarget()
+        concurrency = 1
+
+    results = {}
+    # The test client uses the "testserver" host
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for name, path in routes.items():
+            results[name] = {
+                "path": path,
+                **bench_route(target, path, requests, concurrency, warmup, cold),
+            }
+            if report is not None:
+                report(name, results[name])
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "mode": "http" if base_url else "in-process",
+            "base_url": base_url,
+            "requests": requests,
+            "concurrency": concurrency,
+            "cold": cold,
+            "database": connection.vendor,
+            "settings": settings.SETTINGS_MODULE,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "topics": Topic.objects.filter(is_active=True).count(),
+            "dashboards": DashboardData.objects.count(),
+        },
+        "routes": results,
+    }
+
+
+def compare(
+    baseline,
+    current,
+    latency_threshold=LATENCY_THRESHOLD,
+    queries_threshold=QUERIES_THRESHOLD,
+    latency_floor_ms=LATENCY_FLOOR_MS,
+):
+    """Compare two benchmark results route by route.
+
+    A route regresses when its p95 latency grew by more than
+    `latency_threshold` (relative) and by more than `latency_floor_ms`
+    (absolute, as sub-millisecond timings vary widely between runs), when it
+    makes more than `queries_threshold` extra queries per request, or when it
+    now errors.
+
+    Returns:
+        list: One dict per route present in both results, with the baseline
+        and current values and the list of `regressions`.
+    """
+    rows = []
+    for name, now in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        regressions = []
+        increase = now["p95_ms"] - before["p95_ms"]
+        if increase > max(before["p95_ms"] * latency_threshold, latency_floor_ms):
+            regressions.append("p95")
+        if (
+            now["queries"] is not None
+            and before["queries"] is not None
+            and now["queries"] > before["queries"] + queries_threshold
+        ):
+            regressions.append("queries")
+        if now["errors"] > before["errors"]:
+            regressions.append("errors")
+        rows.append(
+            {"name": name, "before": before, "now": now, "regressions": regressions}
+        )
+    return rows
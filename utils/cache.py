@@ -0,0 +1,34 @@
+"""Cache utilities for Pathogens Portal.
+
+Helpers shared by views that keep rendered output in the cache.
+"""
+
+import functools
+import hashlib
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import engines
+
+
+@functools.cache
+def get_templates_version():
+    """Return a digest of every template source the project can render.
+
+    The digest is computed once per process and is meant to be part of
+    cache keys for rendered output, so that deploying changed templates
+    automatically invalidates previously cached pages. It also covers the
+    static files manifest (if any), as rendered output embeds hashed URLs.
+
+    Returns:
+        str: A short hexadecimal digest of the template sources.
+    """
+    digest = hashlib.sha1()
+    for engine in engines.all():
+        for template_dir in engine.template_dirs:
+            template_dir = Path(template_dir)
+            for path in sorted(template_dir.rglob("*.html")):
+                digest.update(str(path.relative_to(template_dir)).encode())
+                digest.update(path.read_bytes())
+    digest.update(getattr(staticfiles_storage, "manifest_hash", "").encode())
+    return digest.hexdigest()[:12]
@@ -0,0 +1,130 @@
+"""System checks for Pathogens Portal.
+
+`check_view_indexes` warns when a list or detail view built on the base
+views filters and orders (or looks up) on columns that no database index
+covers, so every such query would scan the whole table.
+"""
+
+from django.core import checks
+from django.db.models import UniqueConstraint
+from django.db.models.constants import LOOKUP_SEP
+from django.urls import URLResolver, get_resolver
+
+
+def _iter_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_view_classes(pattern.url_patterns)
+        else:
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class is not None:
+                yield view_class
+
+
+def get_model_indexes(model):
+    """Return the field names of every index of a model, in column order."""
+    opts = model._meta
+    indexes = [
+        tuple(name.lstrip("-") for name in index.fields)
+        for index in opts.indexes
+        if index.fields and index.condition is None
+    ]
+    indexes += [
+        tuple(constraint.fields)
+        for constraint in opts.constraints
+        if isinstance(constraint, UniqueConstraint)
+        and constraint.fields
+        and constraint.condition is None
+    ]
+    indexes += [tuple(fields) for fields in opts.unique_together]
+    indexes += [
+        (field.name,)
+        for field in opts.concrete_fields
+        if field.db_index or field.unique
+    ]
+    return indexes
+
+
+def _equality_columns(model, lookup):
+    """Return the local fields a lookup dict tests for equality."""
+    columns = set()
+    for key in lookup:
+        name, _, transform = key.partition(LOOKUP_SEP)
+        if transform in ("", "exact"):
+            columns.add(model._meta.get_field(name).name)
+    return columns
+
+
+def _is_covered(indexes, equal, order):
+    """Return True if an index has the `equal` columns first, then `order`."""
+    for fields in indexes:
+        if set(fields[: len(equal)]) != equal:
+            continue
+        if order is None or fields[len(equal) : len(equal) + 1] == (order,):
+            return True
+    return False
+
+
+def _required_index(view_class):
+    """Return the (equality columns, order column) a view needs, or None."""
+    from utils.views import BaseDetailView, BaseListView
+
+    if not issubclass(view_class, (BaseListView, BaseDetailView)):
+        return None
+    model = view_class.model
+    if model is None:
+        return None
+    equal = _equality_columns(model, view_class._filter_lookup)
+
+    if issubclass(view_class, BaseDetailView):
+        field = model._meta.get_field(view_class.slug_field)
+        # A unique lookup field is found through its own index
+        if field.unique:
+            return None
+        return equal | {field.name}, None
+
+    ordering = view_class.ordering or model._meta.ordering
+    if isinstance(ordering, str):
+        ordering = [ordering]
+    order = ordering[0].lstrip("-") if ordering else None
+    if order == "pk":
+        order = model._meta.pk.name
+    return equal, order
+
+
+@checks.register(checks.Tags.models)
+def check_view_indexes(app_configs, **kwargs):
+    """Warn about base views whose filter and ordering lack an index."""
+    warnings = []
+    seen = set()
+    for view_class in _iter_view_classes(get_resolver().url_patterns):
+        if view_class in seen:
+            continue
+        seen.add(view_class)
+
+        required = _required_index(view_class)
+        if required is None:
+            continue
+        model = view_class.model
+        if app_configs is not None and model._meta.app_config not in app_configs:
+            continue
+
+        equal, order = required
+        if _is_covered(get_model_indexes(model), equal, order):
+            continue
+
+        fields = sorted(equal) + ([order] if order else [])
+        warnings.append(
+            checks.Warning(
+                f"{view_class.__module__}.{view_class.__qualname__} queries "
+                f"{model.__name__} on {', '.join(fields)} without a matching "
+                "database index.",
+                hint=(
+                    f"Add models.Index(fields={fields!r}) to "
+                    f"{model.__name__}.Meta.indexes."
+                ),
+                obj=view_class,
+                id="utils.W001",
+            )
+        )
+    return warnings
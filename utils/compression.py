@@ -0,0 +1,113 @@
+"""Response compression for Pathogens Portal.
+
+The `CompressionMiddleware` (see `utils.middleware`) compresses HTML, JSON
+and other text responses with brotli when the client accepts it, gzip
+otherwise. Streamed responses (e.g. the dashboard data) are compressed chunk
+by chunk, each chunk being flushed so clients can decode it on arrival.
+
+Static files are not concerned: they are precompressed by `collectstatic`
+and served by WhiteNoise before the middleware.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - installed with whitenoise[brotli]
+    brotli = None
+
+# Brotli quality for responses compressed on the fly: close to gzip's speed
+# at level 6, with smaller output (11 is for precompressed static files)
+BROTLI_QUALITY = 4
+
+GZIP_LEVEL = 6
+
+# Content types worth compressing, other types are usually compressed already
+COMPRESSIBLE_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def get_encodings():
+    """Return the supported encodings, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Return the preferred encoding accepted by a client, or None.
+
+    Args:
+        accept_encoding (str): Value of the `Accept-Encoding` request header,
+            e.g. "gzip, deflate, br;q=0.9".
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in get_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        # Ties go to the earlier, preferred encoding
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    """Return True if responses of this content type are worth compressing."""
+    return content_type.split(";")[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class StreamCompressor:
+    """Incremental compressor for the given encoding ("br" or "gzip")."""
+
+    def __init__(self, encoding):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            # wbits=31 writes the gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def compress(self, chunk):
+        """Return the compressed chunk, flushed so it can be decoded already."""
+        return self._compress(chunk) + self._flush()
+
+    def finish(self):
+        """Return the end of the compressed stream."""
+        return self._finish()
+
+
+def compress(content, encoding):
+    """Return the content compressed with the given encoding."""
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of chunks, yielding one compressed chunk each."""
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
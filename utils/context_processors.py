@@ -0,0 +1,34 @@
+"""Template context processors for Pathogens Portal."""
+
+from django.contrib.auth import context_processors as auth_context_processors
+from django.contrib.messages import context_processors as messages_context_processors
+
+from utils.cache import get_templates_version
+
+
+def templates_version(request):
+    """Add the templates version, used to key cached template fragments.
+
+    Fragments cached with `{% cache %}` vary on it, so deploying changed
+    templates (or static files referenced by them) never serves stale chrome.
+    """
+    return {"templates_version": get_templates_version()}
+
+
+def auth(request):
+    """Add `user` and `perms`, except on public routes.
+
+    Public routes have no authenticated user (see
+    `utils.middleware.PublicRouteMiddleware`), so their pages must not
+    depend on one.
+    """
+    if getattr(request, "is_public_route", False):
+        return {}
+    return auth_context_processors.auth(request)
+
+
+def messages(request):
+    """Add `messages` and `DEFAULT_MESSAGE_LEVELS`, except on public routes."""
+    if getattr(request, "is_public_route", False):
+        return {}
+    return messages_context_processors.messages(request)
@@ -0,0 +1,159 @@
+"""Database utilities for Pathogens Portal.
+
+Helpers for the PostgreSQL connection pools (see `DB_POOL` in the settings),
+each process having one pool per database alias created on first use, and
+the routing of reads to the optional read replica.
+
+Reads go to the replica only for views declaring `read_from_replica = True`
+(the public list, detail and dashboard data views), as decided per request
+by `ReplicaRoutingMiddleware` (see `utils.middleware`). Everything else
+(admin, management commands such as data ingestion) uses the primary.
+After a request wrote to the database, the client is pinned to the primary
+for `DB_REPLICA_PIN_SECONDS` with a cookie, so that editors see their own
+changes despite the replication lag.
+"""
+
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Database alias of the read replica (see `DATABASE_REPLICA_URL`)
+REPLICA_ALIAS = "replica"
+
+# Cookie pinning a client to the primary database after a write
+PIN_COOKIE = "spp_primary"
+
+_routing = contextvars.ContextVar("database_routing", default=None)
+
+_stats_lock = threading.Lock()
+_stats_logged_at = time.monotonic()
+
+
+def get_pools():
+    """Return the connection pools of this process, keyed by database alias."""
+    return {
+        alias: connections[alias].pool
+        for alias in connections
+        if connections.settings[alias].get("OPTIONS", {}).get("pool")
+    }
+
+
+def close_connections():
+    """Close all database connections of this process, including the pools.
+
+    Pools run background threads and hold open sockets, so they must be
+    closed before forking (e.g. the gunicorn master with `--preload`, or a
+    process pool); children then create their own.
+    """
+    connections.close_all()
+    for alias in get_pools():
+        connections[alias].close_pool()
+
+
+def log_pool_saturation(**kwargs):
+    """Log when requests had to wait for a pooled connection.
+
+    Connected to `request_finished`; the pool statistics are read and reset
+    at most every `DB_POOL_LOG_INTERVAL` seconds, and a warning is logged if
+    requests waited for a connection, or timed out, in the meantime.
+    """
+    global _stats_logged_at
+
+    interval = getattr(settings, "DB_POOL_LOG_INTERVAL", 0)
+    if not interval or time.monotonic() - _stats_logged_at < interval:
+        return
+    # Only one thread reads the statistics, the others do not wait for it
+    if not _stats_lock.acquire(blocking=False):
+        return
+    try:
+        _stats_logged_at = time.monotonic()
+        for alias, pool in get_pools().items():
+            stats = pool.pop_stats()
+            queued = stats.get("requests_queued", 0)
+            errors = stats.get("requests_errors", 0)
+            if not queued and not errors:
+                continue
+            logger.warning(
+                "Database pool '%s' saturated: %d of %d requests waited for a "
+                "connection (%d ms in total), %d timed out; %d/%d connections, "
+                "%d available.",
+                alias,
+                queued,
+                stats.get("requests_num", 0),
+                stats.get("requests_wait_ms", 0),
+                errors,
+                stats.get("pool_size", 0),
+                stats.get("pool_max", 0),
+                stats.get("pool_available", 0),
+            )
+    finally:
+        _stats_lock.release()
+
+
+class RequestRouting:
+    """Database routing state of the current request."""
+
+    __slots__ = ("use_replica", "wrote")
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def current_routing():
+    """Return the routing state of the current request, or None."""
+    return _routing.get()
+
+
+@contextlib.contextmanager
+def routing():
+    """Route the queries run in this context with a `RequestRouting`."""
+    state = RequestRouting()
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def has_replica():
+    """Return True if a read replica is configured."""
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Send the reads of opted-in requests to the replica, the rest to primary."""
+
+    def db_for_read(self, model, **hints):
+        """Use the replica if the current request reads from it."""
+        state = _routing.get()
+        if state is not None and state.use_replica and has_replica():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Always write to the primary, and remember the request wrote."""
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between objects read from either database."""
+        databases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Never migrate the replica, it follows the primary."""
+        if db == REPLICA_ALIAS:
+            return False
+        return None
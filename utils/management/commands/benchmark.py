@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import benchmark
+
+
+class Command(BaseCommand):
+    """Benchmark every route of `core/urls.py` and save the results as JSON.
+
+    The database is first seeded with topics and dashboards (see
+    `utils.benchmark`), which are removed after the run unless `--keep-seed`
+    is given (then with `--clear`). Seeded topics are public, so seeding is
+    refused unless `DEBUG` is set or `--allow-seed` is given (e.g. against a
+    staging database). Routes are requested in-process by default, or
+    against a running server with `--url`, which must use the same database.
+
+    For each route the throughput, the p50/p95/p99 latencies and the queries
+    per request are printed and written to the output file, to be compared
+    with `benchmark_compare`. After the warm-up most responses come from the
+    caches; `--cold` clears them before every request, so that the queries
+    and rendering of each route are measured (e.g. to catch N+1 queries).
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py benchmark --topics 200 --output before.json
+            python manage.py benchmark --allow-seed --output staging.json
+            python manage.py benchmark --cold --output before-cold.json
+
+            gunicorn core.wsgi:application --preload --workers 2 --threads 4 &
+            python manage.py benchmark --url http://127.0.0.1:8000 \\
+                --concurrency 8 --output after.json
+    """
+
+    help = "Benchmark every route of the portal and save the results as JSON."
+
+    def add_arguments(self, parser):
+        """Add command line arguments and options."""
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=Path("benchmark.json"),
+            help="File the results are written to (default: benchmark.json).",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server; requests are sent in-process if unset.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per route (default: 200).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Concurrent requests, only with --url (default: 1).",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Unmeasured requests per route sent first (default: 5).",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help=(
+                "Clear the caches before every request (with --url, only the "
+                "caches shared with the server)."
+            ),
+        )
+        parser.add_argument(
+            "--topics",
+            type=int,
+            default=50,
+            help="Number of seeded topics (default: 50).",
+        )
+        parser.add_argument(
+            "--dashboards",
+            type=int,
+            default=5,
+            help="Number of seeded dashboards (default: 5).",
+        )
+        parser.add_argument(
+            "--dashboard-rows",
+            type=int,
+            default=2000,
+            help="Number of daily records per seeded dashboard (default: 2000).",
+        )
+        parser.add_argument(
+            "--route",
+            action="append",
+            dest="routes",
+            help="Only benchmark this URL name (can be repeated).",
+        )
+        parser.add_argument(
+            "--allow-seed",
+            action="store_true",
+            help="Seed the database even when DEBUG is off.",
+        )
+        parser.add_argument(
+            "--keep-seed",
+            action="store_true",
+            help="Keep the seeded data after the run, for the next runs.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the seeded data and exit.",
+        )
+
+    def handle(self, *args, **options):
+        """Seed the database, benchmark the routes and write the results."""
+        if options["clear"]:
+            benchmark.clear_seed()
+            self.stdout.write(self.style.SUCCESS("Seeded data deleted."))
+            return
+
+        if not (settings.DEBUG or options["allow_seed"]):
+            raise CommandError(
+                "Refusing to seed public topics and dashboards with DEBUG off; "
+                "pass --allow-seed if this database is not in production."
+            )
+        topics, dashboards = benchmark.seed(
+            options["topics"], options["dashboards"], options["dashboard_rows"]
+        )
+        self.stdout.write(f"Seeded {topics} topic(s) and {dashboards} dashboard(s).")
+        try:
+            results = self.benchmark(options["routes"], options)
+        finally:
+            if not options["keep_seed"]:
+                benchmark.clear_seed()
+                self.stdout.write("Seeded data deleted.")
+
+        options["output"].write_text(json.dumps(results, indent=2) + "\n")
+        self.stdout.write(
+            self.style.SUCCESS(f"Results written to {options['output']}.")
+        )
+
+    def benchmark(self, names, options):
+        """Benchmark the named routes (or all), printing each result."""
+        routes = benchmark.get_routes()
+        if names:
+            unknown = set(names) - set(routes)
+            if unknown:
+                raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+            routes = {name: routes[name] for name in names}
+
+        self.stdout.write(
+            f"{'route':32} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>8} {'errors':>7}"
+        )
+
+        def report(name, stats):
+            queries = "-" if stats["queries"] is None else f"{stats['queries']:g}"
+            self.stdout.write(
+                f"{name:32} {stats['throughput_rps']:8.1f} {stats['p50_ms']:8.2f} "
+                f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} {queries:>8} "
+                f"{stats['errors']:7}"
+            )
+
+        return benchmark.run(
+            routes,
+            base_url=options["url"],
+            requests=options["requests"],
+            concurrency=options["concurrency"],
+            warmup=options["warmup"],
+            cold=options["cold"],
+            report=report,
+        )
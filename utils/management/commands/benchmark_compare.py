@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import benchmark
+
+
+class Command(BaseCommand):
+    """Compare two `benchmark` results and fail on regressions.
+
+    A route regresses when its p95 latency grew by more than
+    `--latency-threshold` percent and more than `--latency-floor`
+    milliseconds, when it makes more queries per request than allowed by
+    `--queries-threshold`, or when it returns more errors. Results should
+    come from runs in the same mode (e.g. both with `--cold`).
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py benchmark_compare before.json after.json
+            python manage.py benchmark_compare before.json after.json \\
+                --latency-threshold 20
+    """
+
+    help = "Compare two benchmark results and fail if a route regressed."
+
+    def add_arguments(self, parser):
+        """Add command line arguments and options."""
+        parser.add_argument("baseline", type=Path, help="Baseline results file.")
+        parser.add_argument("current", type=Path, help="Current results file.")
+        parser.add_argument(
+            "--latency-threshold",
+            type=float,
+            default=benchmark.LATENCY_THRESHOLD * 100,
+            help="Allowed p95 latency increase in percent (default: 10).",
+        )
+        parser.add_argument(
+            "--latency-floor",
+            type=float,
+            default=benchmark.LATENCY_FLOOR_MS,
+            help="Allowed p95 latency increase in milliseconds (default: 1).",
+        )
+        parser.add_argument(
+            "--queries-threshold",
+            type=float,
+            default=benchmark.QUERIES_THRESHOLD,
+            help="Allowed increase of queries per request (default: 0).",
+        )
+
+    def handle(self, *args, **options):
+        """Print the comparison and raise if any route regressed."""
+        try:
+            baseline = json.loads(options["baseline"].read_text())
+            current = json.loads(options["current"].read_text())
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Could not read results: {error}") from error
+
+        if baseline["meta"].get("cold", False) != current["meta"].get("cold", False):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The results were not both run with --cold, latencies and "
+                    "queries are not comparable."
+                )
+            )
+
+        rows = benchmark.compare(
+            baseline,
+            current,
+            latency_threshold=options["latency_threshold"] / 100,
+            queries_threshold=options["queries_threshold"],
+            latency_floor_ms=options["latency_floor"],
+        )
+        self.stdout.write(
+            f"{'route':32} {'p95 ms':>17} {'change':>8} {'queries':>13}  status"
+        )
+        for row in rows:
+            before, now = row["before"], row["now"]
+            change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            status = (
+                self.style.ERROR("REGRESSED: " + ", ".join(row["regressions"]))
+                if row["regressions"]
+                else "ok"
+            )
+            self.stdout.write(
+                f"{row['name']:32} {before['p95_ms']:8.2f}>{now['p95_ms']:8.2f} "
+                f"{change:+7.1f}% {before['queries']!s:>6}>{now['queries']!s:>6}  "
+                f"{status}"
+            )
+
+        regressed = [row["name"] for row in rows if row["regressions"]]
+        if regressed:
+            raise CommandError(
+                f"{len(regressed)} route(s) regressed: {', '.join(regressed)}"
+            )
+        self.stdout.write(self.style.SUCCESS("No regression."))
@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import static_site
+from utils.db import close_connections
+
+
+class Command(BaseCommand):
+    """Export every public page as HTML files with gzip and brotli variants.
+
+    Pages are written to `<output>/<path>/index.html` (see
+    `utils.static_site`), to be served by nginx (with `gzip_static` and
+    `brotli_static`) or a CDN; static and media files are served from
+    `STATIC_ROOT` and `MEDIA_ROOT` as usual. Exports are incremental: a
+    manifest keeps the version of each exported page, and only new or changed
+    pages (e.g. topics whose `updated_at` changed, or every page after a
+    template change) are rendered again, in a pool of worker processes.
+    Pages no longer public (e.g. deactivated topics) are removed.
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py export_static_site --output /srv/portal
+            python manage.py export_static_site --output /srv/portal --all
+    """
+
+    help = "Export the public pages as static HTML files, incrementally."
+
+    def add_arguments(self, parser):
+        """Add command line arguments and options."""
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=Path("static_site"),
+            help="Directory the pages are written to (default: static_site).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render every page again, not only new or changed ones.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (default: number of CPUs).",
+        )
+
+    def handle(self, *args, **options):
+        """Render the changed pages, remove the stale ones and save the manifest."""
+        output = options["output"]
+        output.mkdir(parents=True, exist_ok=True)
+
+        pages = static_site.get_pages()
+        exported = {} if options["all"] else static_site.read_manifest(output)
+        changed = [
+            path
+            for path, version in pages.items()
+            if exported.get(path) != version
+            or not static_site.get_file(output, path).exists()
+        ]
+        removed = [path for path in exported if path not in pages]
+
+        for path in removed:
+            static_site.remove_page(output, path)
+            self.stdout.write(f"Removed '{path}'")
+
+        failed = []
+        if changed:
+            # Forked workers must not share the parent's database connections
+            close_connections()
+
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=django.setup
+            ) as executor:
+                futures = {
+                    executor.submit(static_site.export_page, output, path): path
+                    for path in changed
+                }
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        status = future.result()
+                    except OSError as error:
+                        status = error
+                    if status != 200:
+                        failed.append(path)
+                        self.stderr.write(f"Failed to export '{path}': {status}")
+                    else:
+                        self.stdout.write(f"Exported '{path}'")
+
+        # Failed pages are retried by the next export
+        static_site.write_manifest(
+            output,
+            {path: version for path, version in pages.items() if path not in failed},
+        )
+
+        if failed:
+            raise CommandError(f"{len(failed)} page(s) failed to export.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {len(changed)} page(s), removed {len(removed)}, "
+                f"{len(pages) - len(changed)} unchanged."
+            )
+        )
@@ -0,0 +1,77 @@
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.assets import VARIANT_FORMATS, get_image_variants
+
+VARIANT_EXTENSIONS = {extension for extension, _mime, _options in VARIANT_FORMATS}
+
+
+class Command(BaseCommand):
+    """Report the transfer size of collected static files and enforce budgets.
+
+    For every file in the `collectstatic` manifest matching a pattern of
+    `settings.STATIC_SIZE_BUDGETS`, the size of the smallest variant a client
+    can receive (the file itself, its brotli/gzip encodings or, for original
+    rasters, its AVIF/WebP variants) is compared to the budget of the first
+    matching pattern. Variants are reported with their own size. The
+    command fails if any budget is exceeded, so it can break the image build.
+
+    Example:
+        .. code-block:: bash
+
+            python manage.py collectstatic --noinput
+            python manage.py static_size_report
+    """
+
+    help = "Report collected static file sizes and fail if a budget is exceeded."
+
+    def handle(self, *args, **options):
+        """Print the size report and raise if a budget is exceeded."""
+        manifest = getattr(staticfiles_storage, "hashed_files", None)
+        if not manifest:
+            raise CommandError(
+                "No static files manifest found, run `collectstatic` with a "
+                "manifest storage first."
+            )
+
+        budgets = getattr(settings, "STATIC_SIZE_BUDGETS", {})
+        over_budget = []
+        for name in sorted(manifest):
+            budget = next(
+                (limit for pattern, limit in budgets.items() if fnmatch(name, pattern)),
+                None,
+            )
+            if budget is None:
+                continue
+
+            size = self.transfer_size(name, manifest)
+            status = ""
+            if size > budget:
+                over_budget.append(name)
+                status = f"  OVER BUDGET ({budget / 1024:.0f} KB)"
+            self.stdout.write(f"{size / 1024:10.1f} KB  {name}{status}")
+
+        if over_budget:
+            raise CommandError(
+                f"{len(over_budget)} static file(s) exceed their size budget: "
+                + ", ".join(over_budget)
+            )
+        self.stdout.write(self.style.SUCCESS("All static files are within budget."))
+
+    def transfer_size(self, name, manifest):
+        """Return the size of the smallest variant of a collected file."""
+        candidates = [manifest[name]]
+        candidates += [f"{manifest[name]}.{encoding}" for encoding in ("br", "gz")]
+        # A variant shares its stem with the original and the other variants
+        if name.rsplit(".", 1)[-1].lower() not in VARIANT_EXTENSIONS:
+            candidates += [
+                manifest[variant] for variant, _mime in get_image_variants(name)
+            ]
+        return min(
+            staticfiles_storage.size(candidate)
+            for candidate in candidates
+            if staticfiles_storage.exists(candidate)
+        )
@@ -0,0 +1,283 @@
+"""Request metrics for Pathogens Portal.
+
+The `RequestMetricsMiddleware` (see `utils.middleware`) measures, for every
+request, the database queries (count and time), the template rendering, the
+markdown rendering and the total time. They are sent back in a
+`Server-Timing` header and aggregated into histograms per URL name, exposed
+in the Prometheus text format by `MetricsView`.
+
+Histograms are kept in memory per process behind a lock, which is safe
+under gunicorn gthread workers. When `settings.METRICS_DIR` is set, each
+process also writes a snapshot of its histograms there (at most every
+`FLUSH_INTERVAL` seconds), and the exposition merges the snapshots of all
+worker processes. Snapshots of processes that are no longer running are
+removed instead, so restarted workers are not counted twice.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds of the duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the query count histogram buckets
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Measured phases, as (name, Server-Timing description)
+PHASES = {
+    "db": "Database",
+    "template": "Template rendering",
+    "markdown": "Markdown rendering",
+    "total": "Total",
+}
+
+# Seconds between two snapshots written by a process to `METRICS_DIR`
+FLUSH_INTERVAL = 5
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Durations (in seconds) and query count of the current request."""
+
+    __slots__ = ("durations", "queries")
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+
+    def server_timing(self):
+        """Return the `Server-Timing` header value of the request."""
+        entries = []
+        for phase, description in PHASES.items():
+            if phase not in self.durations:
+                continue
+            if phase == "db":
+                description = f"{description} ({self.queries} queries)"
+            entries.append(
+                f'{phase};dur={self.durations[phase] * 1000:.1f};desc="{description}"'
+            )
+        return ", ".join(entries)
+
+
+def current():
+    """Return the metrics of the current request, or None outside requests."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def collect():
+    """Collect the metrics measured in this context into a `RequestMetrics`."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def measure(phase):
+    """Add the time spent in this context to a phase of the current request.
+
+    Does nothing outside of a request (e.g. in management commands).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[phase] += time.perf_counter() - start
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the current request's queries."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    metrics.queries += 1
+    with measure("db"):
+        return execute(sql, params, many, context)
+
+
+def install_execute_wrapper(wrapper):
+    """Run a database execute wrapper around every query of the process.
+
+    The wrapper is added to each connection when it is opened (and to the
+    connections already open in this thread), instead of around each request,
+    so that connections opened during a request (e.g. to the replica) are
+    covered too. Wrappers therefore find their request through context
+    variables.
+    """
+
+    def install(connection, **kwargs):
+        # First, so execute_wrapper() blocks still pop their own wrapper
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, wrapper)
+
+    connection_created.connect(install, weak=False, dispatch_uid=id(wrapper))
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+class Histograms:
+    """Thread-safe histograms of request metrics per URL name.
+
+    Series are keyed by (metric, view, phase), with `metric` either
+    "duration" (per phase, in seconds) or "queries" (phase is empty). Each
+    series holds the per-bucket counts (the last one being +Inf), the number
+    of observations and their sum.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._series = {}
+        self._flushed_at = time.monotonic()
+
+    def _observe(self, key, buckets, value):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(buckets) + 1), 0, 0.0]
+        series[0][bisect.bisect_left(buckets, value)] += 1
+        series[1] += 1
+        series[2] += value
+
+    def observe(self, view, metrics):
+        """Add the metrics of a finished request to the histograms."""
+        with self._lock:
+            for phase, duration in metrics.durations.items():
+                self._observe(("duration", view, phase), DURATION_BUCKETS, duration)
+            self._observe(("queries", view, ""), QUERY_BUCKETS, metrics.queries)
+        self.maybe_flush()
+
+    def snapshot(self):
+        """Return a copy of the series as a list of [metric, view, phase, data]."""
+        with self._lock:
+            return [
+                [*key, [list(counts), count, total]]
+                for key, (counts, count, total) in self._series.items()
+            ]
+
+    def maybe_flush(self):
+        """Write a snapshot to `METRICS_DIR` if the last one is old enough."""
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory or time.monotonic() - self._flushed_at < FLUSH_INTERVAL:
+            return
+        # Only one thread writes, the others do not wait for it
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flushed_at = time.monotonic()
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{os.getpid()}.json"
+            temporary = path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self.snapshot()))
+            temporary.replace(path)
+        finally:
+            self._flush_lock.release()
+
+
+histograms = Histograms()
+
+
+def _is_running(pid):
+    """Return True if a process with this id exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running under another user
+        return True
+    return True
+
+
+def merged_series():
+    """Return the series of this process merged with other workers' snapshots."""
+    snapshots = [histograms.snapshot()]
+    directory = getattr(settings, "METRICS_DIR", None)
+    if directory and Path(directory).is_dir():
+        for path in Path(directory).iterdir():
+            if not path.stem.isdigit() or int(path.stem) == os.getpid():
+                continue
+            if not _is_running(int(path.stem)):
+                # Left behind by a worker that exited (or was killed)
+                path.unlink(missing_ok=True)
+                continue
+            if path.suffix != ".json":
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Being replaced or removed by its worker
+                continue
+
+    merged = {}
+    for snapshot in snapshots:
+        for metric, view, phase, (counts, count, total) in snapshot:
+            series = merged.get((metric, view, phase))
+            if series is None:
+                merged[(metric, view, phase)] = [list(counts), count, total]
+                continue
+            series[0] = [a + b for a, b in zip(series[0], counts, strict=True)]
+            series[1] += count
+            series[2] += total
+    return merged
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    """Return the histograms in the Prometheus text exposition format."""
+    families = {
+        "duration": (
+            "spp_request_duration_seconds",
+            "Time spent per request phase, by URL name.",
+            DURATION_BUCKETS,
+        ),
+        "queries": (
+            "spp_request_queries",
+            "Database queries per request, by URL name.",
+            QUERY_BUCKETS,
+        ),
+    }
+    series = merged_series()
+    lines = []
+    for metric, (name, description, buckets) in families.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for (series_metric, view, phase), (counts, count, total) in sorted(
+            series.items()
+        ):
+            if series_metric != metric:
+                continue
+            labels = f'view="{_escape(view)}"'
+            if phase:
+                labels += f',phase="{_escape(phase)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(
+                [*map(str, buckets), "+Inf"], counts, strict=True
+            ):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,321 @@
+"""Middleware for Pathogens Portal."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware import csrf
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.generic.edit import FormMixin
+
+from utils import compression, db, metrics, query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Measure each request and add it to the per URL name histograms.
+
+    Database queries are counted and timed with an execute wrapper, template
+    rendering is timed around `TemplateResponse` rendering and markdown
+    rendering through `utils.metrics.measure("markdown")`. The metrics are
+    then added to the per URL name histograms (see `utils.metrics`), and
+    reported in a `Server-Timing` header to staff users, or to everyone when
+    `DEBUG` is set. Public responses, which may be shared by caches, never
+    carry it otherwise.
+
+    Should be placed right after `SecurityMiddleware` (and WhiteNoise), so
+    the total time covers the rest of the stack but not static files.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.install_execute_wrapper(metrics.record_query)
+
+    def __call__(self, request):
+        """Run the request with metrics collection."""
+        start = time.perf_counter()
+        with metrics.collect() as request_metrics:
+            response = self.get_response(request)
+            request_metrics.durations["total"] = time.perf_counter() - start
+        return self.report(request, response, request_metrics)
+
+    def report(self, request, response, request_metrics):
+        """Observe the request metrics, adding `Server-Timing` if allowed."""
+        if self.shows_server_timing(request):
+            response.headers["Server-Timing"] = request_metrics.server_timing()
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "<unmatched>"
+        metrics.histograms.observe(view, request_metrics)
+        return response
+
+    def shows_server_timing(self, request):
+        """Return True if the request may see its `Server-Timing` header."""
+        if settings.DEBUG:
+            return True
+        # Public routes have no user (see `PublicRouteMiddleware`)
+        user = getattr(request, "user", None)
+        return user is not None and user.is_active and user.is_staff
+
+    def process_template_response(self, request, response):
+        """Time the template rendering that follows this hook."""
+        start = time.perf_counter()
+        request_metrics = metrics.current()
+
+        def stop(response):
+            if request_metrics is not None:
+                request_metrics.durations["template"] += time.perf_counter() - start
+
+        response.add_post_render_callback(stop)
+        return response
+
+
+class CompressionMiddleware:
+    """Compress text responses with brotli or gzip (see `utils.compression`).
+
+    Responses smaller than `COMPRESSION_MIN_SIZE` bytes are sent as-is;
+    streamed responses are compressed chunk by chunk, unless their
+    `Content-Length` shows they are small. Only active when the
+    `COMPRESS_RESPONSES` setting is True (i.e. not left to the ingress).
+
+    Should be placed before any middleware reading the response content.
+    """
+
+    def __init__(self, get_response):
+        if not settings.COMPRESS_RESPONSES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Run the request, then compress its response."""
+        return self.compress(request, self.get_response(request))
+
+    def compress(self, request, response):
+        """Compress the response with the client's preferred encoding."""
+        if (
+            response.has_header("Content-Encoding")
+            or not compression.is_compressible(response.get("Content-Type", ""))
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return response
+        if response.streaming:
+            length = response.get("Content-Length")
+            if length is not None and int(length) < settings.COMPRESSION_MIN_SIZE:
+                return response
+        elif len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.choose_encoding(
+            request.headers.get("Accept-Encoding", "")
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response.headers["Content-Length"]
+        else:
+            content = compression.compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # The content differs from the uncompressed one, see GZipMiddleware
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Enforce the `query_budget` declared by views (see `utils.query_budget`).
+
+    Every query is recorded with its stack trace, which is too costly for
+    production: the middleware is only active when the
+    `QUERY_BUDGET_ACTION` setting is "log" or "raise" (e.g. in development).
+    """
+
+    def __init__(self, get_response):
+        self.action = getattr(settings, "QUERY_BUDGET_ACTION", None)
+        if self.action not in ("log", "raise"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.install_execute_wrapper(query_budget.record_query)
+
+    def __call__(self, request):
+        """Run the request, then report it if it exceeded its query budget."""
+        with query_budget.recording() as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def check(self, request, recorder):
+        """Log or raise a report if the request exceeded its query budget."""
+        budget = query_budget.get_query_budget(request)
+        if budget is not None and len(recorder.queries) > budget:
+            report = recorder.report(request.path, budget)
+            if self.action == "raise":
+                raise query_budget.QueryBudgetExceeded(report)
+            logger.warning(report)
+
+
+class ReplicaRoutingMiddleware:
+    """Route the reads of opted-in views to the read replica (see `utils.db`).
+
+    Views declaring `read_from_replica = True` read from the replica, unless
+    the client is pinned to the primary. Unsafe requests that wrote to the
+    database pin their client to the primary for `DB_REPLICA_PIN_SECONDS`.
+    Only active when a replica is configured.
+    """
+
+    def __init__(self, get_response):
+        if not db.has_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Run the request with its own routing state."""
+        with db.routing() as state:
+            response = self.get_response(request)
+        return self.pin(request, response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Read from the replica if the view allows it and the client is not pinned."""
+        view = getattr(view_func, "view_class", view_func)
+        state = db.current_routing()
+        if (
+            state is not None
+            and getattr(view, "read_from_replica", False)
+            and db.PIN_COOKIE not in request.COOKIES
+        ):
+            state.use_replica = True
+
+    def pin(self, request, response, state):
+        """Pin the client to the primary if the request wrote to the database."""
+        if state.wrote and request.method not in ("GET", "HEAD", "OPTIONS"):
+            response.set_cookie(
+                db.PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def is_public_route(request):
+    """Return True if the request is a read-only request to a public view.
+
+    Public views declare `public_route = True` (the base views do). Unsafe
+    methods, unknown URLs and views handling forms are never public, so the
+    admin and form pages keep sessions, CSRF protection, auth and messages.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    try:
+        match = resolve(request.path_info, getattr(request, "urlconf", None))
+    except Resolver404:
+        return False
+    view = getattr(match.func, "view_class", match.func)
+    if isinstance(view, type) and issubclass(view, FormMixin):
+        return False
+    return getattr(view, "public_route", False)
+
+
+class PublicRouteMiddleware:
+    """Serve read-only requests to public views without any per-user state.
+
+    Sets `request.is_public_route` (see `is_public_route`), on which the
+    session, CSRF, auth and messages middleware below do nothing. Public
+    responses are then guaranteed cookie-free and do not vary on `Cookie`.
+    Successful ones (2xx and 304) are marked `Cache-Control: public` (with
+    `PUBLIC_CACHE_MAX_AGE`), so a CDN or reverse proxy can cache them; errors
+    such as 404 are not.
+
+    Must be placed before the session middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Run the request, making the response shareable if it is public."""
+        request.is_public_route = is_public_route(request)
+        response = self.get_response(request)
+        return self.make_public(request, response)
+
+    def make_public(self, request, response):
+        """Drop cookies and `Vary: Cookie` from a public response, allow caching."""
+        if not request.is_public_route:
+            return response
+        if response.cookies:
+            logger.warning(
+                "Dropped cookies %s set by public route %s.",
+                ", ".join(sorted(response.cookies)),
+                request.path,
+            )
+            response.cookies.clear()
+        if response.has_header("Vary"):
+            vary = [
+                header
+                for header in response.headers["Vary"].split(",")
+                if header.strip().lower() != "cookie"
+            ]
+            if vary:
+                response.headers["Vary"] = ",".join(vary)
+            else:
+                del response.headers["Vary"]
+        successful = 200 <= response.status_code < 300 or response.status_code == 304
+        if successful and not response.has_header("Cache-Control"):
+            patch_cache_control(
+                response, public=True, max_age=settings.PUBLIC_CACHE_MAX_AGE
+            )
+        return response
+
+
+class SkipOnPublicRouteMixin:
+    """Pass public route requests through a middleware untouched.
+
+    For Django middleware built on `MiddlewareMixin`, which run their hooks
+    from `__call__`.
+    """
+
+    def __call__(self, request):
+        if getattr(request, "is_public_route", False):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipOnPublicRouteMixin, sessions_middleware.SessionMiddleware):
+    """`SessionMiddleware` skipped on public routes (see `PublicRouteMiddleware`)."""
+
+
+class CsrfViewMiddleware(SkipOnPublicRouteMixin, csrf.CsrfViewMiddleware):
+    """`CsrfViewMiddleware` skipped on public routes (see `PublicRouteMiddleware`)."""
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if getattr(request, "is_public_route", False):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(
+    SkipOnPublicRouteMixin, auth_middleware.AuthenticationMiddleware
+):
+    """`AuthenticationMiddleware` skipped on public routes (see `PublicRouteMiddleware`)."""
+
+
+class MessageMiddleware(SkipOnPublicRouteMixin, messages_middleware.MessageMiddleware):
+    """`MessageMiddleware` skipped on public routes (see `PublicRouteMiddleware`)."""
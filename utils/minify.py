@@ -0,0 +1,47 @@
+"""HTML minification for Pathogens Portal.
+
+`minify_html` strips comments and collapses whitespace in rendered pages.
+The content of `<pre>`, `<code>`, `<textarea>`, `<script>` and `<style>`
+elements (e.g. highlighted code blocks) is kept as-is, where whitespace is
+significant. Runs of whitespace are collapsed to a single space, or to a
+single newline when they contain one, never removed: whitespace between
+inline elements is rendered, and removing it would change the page.
+"""
+
+import re
+
+_TOKENS = re.compile(
+    r"<!--(?P<comment>.*?)-->"
+    r"|(?P<preserved><(?P<tag>pre|code|textarea|script|style)\b.*?</(?P=tag)\s*>)",
+    re.DOTALL | re.IGNORECASE,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _collapse(match):
+    return "\n" if "\n" in match.group() else " "
+
+
+def minify_html(html):
+    """Return the HTML without comments and with collapsed whitespace.
+
+    Conditional comments (`<!--[if ...]>`) are kept.
+    """
+    parts = []
+    # Text between preserved elements, so whitespace around a removed
+    # comment is collapsed as one run
+    text = []
+    position = 0
+    for match in _TOKENS.finditer(html):
+        text.append(html[position : match.start()])
+        position = match.end()
+        comment = match.group("comment")
+        if comment is not None and not comment.startswith("[if"):
+            continue
+        parts.append(_WHITESPACE.sub(_collapse, "".join(text)))
+        parts.append(match.group())
+        text = []
+    text.append(html[position:])
+    parts.append(_WHITESPACE.sub(_collapse, "".join(text)))
+    return "".join(parts)
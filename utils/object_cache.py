@@ -0,0 +1,93 @@
+"""Shared object cache for Pathogens Portal.
+
+Objects and query results read by the public views (see
+`utils.views.ObjectCacheMixin`) are kept in the "objects" cache backend
+(`OBJECT_CACHE_URL`), shared by all worker processes in production.
+
+Entries are keyed by a generation of their model. Saving or deleting an
+instance (`post_save`/`post_delete`, see `invalidate_on_change`) starts a
+new generation right away and again once the transaction commits, so every
+cached object, list and missing-object entry of the model is dropped at
+once; the previous entries are left to expire. Bulk operations bypassing the signals call
+`invalidate()` themselves.
+
+With a read replica, the replica may still return the previous data for a
+while after a change: entries read from it are not stored during the
+first `DB_REPLICA_PIN_SECONDS` of a generation.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from utils import db
+
+# Cache backend (from settings.CACHES) holding the objects
+CACHE_ALIAS = "objects"
+
+# Cached in place of objects that do not exist (e.g. unknown slugs)
+MISSING = "<missing>"
+
+
+def _generation_key(model):
+    return f"objects:{model._meta.label_lower}:generation"
+
+
+def get_generation(model):
+    """Return the current cache generation of a model."""
+    cache = caches[CACHE_ALIAS]
+    generation = cache.get(_generation_key(model))
+    if generation is None:
+        cache.add(_generation_key(model), f"{time.time():.6f}", None)
+        generation = cache.get(_generation_key(model))
+    return generation
+
+
+def make_key(model, generation, *parts):
+    """Return the cache key of an entry of a model generation."""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f"objects:{model._meta.label_lower}:{generation}:{digest}"
+
+
+def is_storable(generation):
+    """Return False if entries read now may predate the generation.
+
+    That is the case when reading from a replica that may not have caught
+    up with the change that started the generation yet.
+    """
+    state = db.current_routing()
+    if state is None or not state.use_replica:
+        return True
+    return time.time() - float(generation) >= settings.DB_REPLICA_PIN_SECONDS
+
+
+def is_missing(value):
+    """Return True if a cached value records a missing object."""
+    return isinstance(value, str) and value == MISSING
+
+
+def invalidate(model, using=None):
+    """Start a new cache generation of a model, and again on commit.
+
+    Renewing right away lets the transaction read its own changes (e.g. in
+    tests, where transactions never commit). Within a transaction, other
+    connections still read the data from before the change and may cache it
+    in the new generation, so it is renewed again once the transaction
+    commits; outside one, `on_commit` renews it right away too.
+    """
+
+    def renew():
+        generation = f"{time.time():.6f}"
+        caches[CACHE_ALIAS].set(_generation_key(model), generation, None)
+
+    if transaction.get_connection(using).in_atomic_block:
+        renew()
+    transaction.on_commit(renew, using=using)
+
+
+def invalidate_on_change(sender, using=None, **kwargs):
+    """`post_save`/`post_delete` receiver invalidating the sender model."""
+    invalidate(sender, using=using)
@@ -0,0 +1,111 @@
+"""Query budgets for Pathogens Portal views.
+
+A view declares the maximum number of database queries a request may make
+with a `query_budget` attribute. During development the
+`QueryBudgetMiddleware` (see `utils.middleware`) records every query of
+the request and, when the budget is exceeded, logs or raises a report
+listing the duplicated SQL with the stack trace of where it was run.
+Tests can assert the budgets with `utils.testing.QueryBudgetTestMixin`.
+"""
+
+import contextlib
+import contextvars
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+# Number of project stack frames kept per recorded query
+STACK_DEPTH = 8
+
+# Query recording machinery, left out of the reported stacks
+_IGNORED_FILES = {
+    str(Path(__file__).with_name(name))
+    for name in ("query_budget.py", "middleware.py", "metrics.py", "testing.py")
+}
+
+
+_current = contextvars.ContextVar("query_recorder", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request made more database queries than its view allows."""
+
+
+def get_query_budget(request):
+    """Return the query budget of the view handling the request, or None."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    return getattr(view, "query_budget", None)
+
+
+def _project_stack():
+    base_dir = str(Path(settings.BASE_DIR).resolve())
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir)
+        and frame.filename not in _IGNORED_FILES
+        and "site-packages" not in frame.filename
+    ]
+    return traceback.format_list(frames[-STACK_DEPTH:])
+
+
+class QueryRecorder:
+    """Database execute wrapper recording the SQL and stack of each query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, _project_stack()))
+        return execute(sql, params, many, context)
+
+    def report(self, path, budget):
+        """Return a report of the queries, duplicated ones first."""
+        counts = Counter(sql for sql, _stack in self.queries)
+        lines = [
+            f"{path} made {len(self.queries)} queries, over its budget of {budget}."
+        ]
+        duplicated = [sql for sql, count in counts.most_common() if count > 1]
+        if duplicated:
+            lines.append("Duplicated queries:")
+        stacks = {}
+        for sql, stack in self.queries:
+            stacks.setdefault(sql, stack)
+        for sql in duplicated:
+            lines.append(f"  {counts[sql]}x {sql}")
+            lines.extend(
+                f"    {line}" for entry in stacks[sql] for line in entry.splitlines()
+            )
+        others = [sql for sql in counts if counts[sql] == 1]
+        if others:
+            lines.append("Other queries:")
+            lines.extend(f"  {sql}" for sql in others)
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def recording():
+    """Record the queries run in this context into a `QueryRecorder`.
+
+    Queries are recorded by `record_query`, which must be installed on the
+    connections (see `utils.metrics.install_execute_wrapper`).
+    """
+    recorder = QueryRecorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper recording queries into the current recorder."""
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
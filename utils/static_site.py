@@ -0,0 +1,161 @@
+"""Static export of the public pages of the portal.
+
+Used by the `export_static_site` management command:
+
+- `get_pages()` lists every public page (see `PublicRouteMiddleware` in
+  `utils.middleware`) with a version: the routes without arguments, and one
+  page per active object of detail views (e.g. every topic slug). Versions
+  derive from the templates version and the `updated_at` of what the page
+  shows, so a page only needs to be rendered again when its version changed.
+- `export_page()` renders a page through the test client (the full
+  middleware stack, as served) and writes it as `index.html`, next to its
+  gzip and brotli variants, so nginx or a CDN can serve the tree as-is.
+- The versions of the exported pages are kept in a manifest, in the export
+  directory, read and written with `read_manifest()` and `write_manifest()`.
+
+JSON endpoints (e.g. the dashboard data) and paginated list pages beyond the
+first one are not exported.
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from whitenoise.compress import Compressor
+
+from utils.cache import get_templates_version
+from utils.views import BaseDetailView, BaseListView
+
+MANIFEST_NAME = "export-manifest.json"
+
+# URL namespaces never exported, whatever their views declare
+SKIPPED_NAMESPACES = {"admin", "djdt", "django_browser_reload"}
+
+_client = None
+
+
+def _iter_patterns(patterns, namespace=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f"{namespace}{pattern.namespace}:"
+            yield from _iter_patterns(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield f"{namespace}{pattern.name}", pattern
+
+
+def _version(*parts):
+    return ":".join(str(part) for part in (get_templates_version(), *parts))
+
+
+def get_pages():
+    """Return every exported page as a {path: version} dict."""
+    pages = {}
+    for name, pattern in _iter_patterns(get_resolver().url_patterns):
+        view_class = getattr(pattern.callback, "view_class", None)
+        if view_class is None or not getattr(view_class, "public_route", False):
+            continue
+        arguments = set(pattern.pattern.converters)
+
+        if not arguments:
+            version = ""
+            if issubclass(view_class, BaseListView):
+                view = view_class()
+                state = (
+                    view.get_queryset()
+                    .order_by()
+                    .aggregate(**view.get_state_aggregates())
+                )
+                version = f"{state['last_modified']}:{state['count']}"
+            pages[reverse(name)] = _version(version)
+
+        elif issubclass(view_class, BaseDetailView) and arguments == {
+            view_class.slug_url_kwarg
+        }:
+            view = view_class()
+            rows = view.get_queryset().values_list(
+                view.slug_field, view.last_modified_field
+            )
+            for slug, updated_at in rows:
+                path = reverse(name, kwargs={view.slug_url_kwarg: slug})
+                pages[path] = _version(updated_at)
+    return pages
+
+
+def get_file(output, path):
+    """Return the file a page path is exported to, within the output directory."""
+    relative = path.strip("/")
+    if not relative:
+        return Path(output) / "index.html"
+    if path.endswith("/"):
+        return Path(output) / relative / "index.html"
+    return Path(output) / relative
+
+
+def _variants(file):
+    return [file, file.with_name(f"{file.name}.gz"), file.with_name(f"{file.name}.br")]
+
+
+def export_page(output, path):
+    """Render a page and write it with its compressed variants.
+
+    Run in the worker processes of `export_static_site`.
+
+    Returns:
+        int: Status code of the response; nothing is written unless 200.
+    """
+    global _client
+    if _client is None:
+        # Errors are logged and answered with a 500, as when served
+        _client = Client(raise_request_exception=False)
+
+    # The test client uses the "testserver" host
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        response = _client.get(path)
+    if response.status_code != 200:
+        return response.status_code
+
+    file = get_file(output, path)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    # Variants of the previous export may not be replaced, if not effective
+    for variant in _variants(file)[1:]:
+        variant.unlink(missing_ok=True)
+    temporary = file.with_name(f".{file.name}.tmp")
+    temporary.write_bytes(response.content)
+    temporary.replace(file)
+    Compressor(quiet=True).compress(str(file))
+    return response.status_code
+
+
+def remove_page(output, path):
+    """Delete an exported page, its variants and the directories left empty."""
+    file = get_file(output, path)
+    for variant in _variants(file):
+        variant.unlink(missing_ok=True)
+    directory = file.parent
+    output = Path(output)
+    while directory != output and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+
+def read_manifest(output):
+    """Return the {path: version} pages of the last export, empty if none."""
+    try:
+        return json.loads((Path(output) / MANIFEST_NAME).read_text())["pages"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_manifest(output, pages):
+    """Write the {path: version} pages of the export."""
+    path = Path(output) / MANIFEST_NAME
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps({"pages": pages}, indent=2, sort_keys=True))
+    temporary.replace(path)
@@ -0,0 +1,61 @@
+"""Static files storage for Pathogens Portal."""
+
+from django.core.files.base import ContentFile
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from utils.assets import VARIANT_FORMATS, optimize_asset, raster_variants
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Manifest storage that optimizes assets before hashing and compressing.
+
+    During `collectstatic`, every collected SVG is minified and every raster
+    re-encoded (see `utils.assets`), and WebP/AVIF variants of rasters are
+    added next to them. The optimized files and variants then go through the
+    usual hashing, manifest and gzip/brotli steps, except for the variants,
+    which are compressed already.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Optimize assets, then hash and compress them."""
+        if not dry_run:
+            self.optimize(paths)
+        yield from super().post_process(paths, dry_run, **options)
+
+    def optimize(self, paths):
+        """Replace collected assets by their optimized version, adding variants.
+
+        Args:
+            paths (dict): Collected paths mapped to their (storage, path)
+                source, updated to point to the optimized files.
+        """
+        for name in list(paths):
+            source_storage, source_path = paths[name]
+            with source_storage.open(source_path) as source:
+                content = source.read()
+
+            optimized = optimize_asset(name, content)
+            if optimized is not None:
+                self._replace(name, optimized)
+                paths[name] = (self, name)
+
+            variants = raster_variants(name, optimized or content)
+            for variant_name, variant in variants.items():
+                if variant_name not in paths:
+                    self._replace(variant_name, variant)
+                    paths[variant_name] = (self, variant_name)
+
+    def _replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self.save(name, ContentFile(content))
+
+    def create_compressor(self, **kwargs):
+        """Return the gzip/brotli compressor, skipping the image variants."""
+        extensions = kwargs.get("extensions") or Compressor.SKIP_COMPRESS_EXTENSIONS
+        kwargs["extensions"] = [
+            *extensions,
+            *(extension for extension, _mime, _options in VARIANT_FORMATS),
+        ]
+        return super().create_compressor(**kwargs)
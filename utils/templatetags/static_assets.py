@@ -0,0 +1,36 @@
+import mimetypes
+
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from utils.assets import get_image_variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_set(path):
+    """Return a CSS image value offering the smallest variants of an image.
+
+    Produces an `image-set()` listing the collected AVIF/WebP variants of the
+    image before the image itself, so the browser picks the first format it
+    supports, or a plain `url()` when the image has no variants.
+
+    Example:
+        .. code-block:: html
+
+            {% load static_assets %}
+            <div style="background-image: {% image_set 'images/banner.jpg' %};">
+    """
+    variants = get_image_variants(path)
+    if not variants:
+        return format_html("url('{}')", static(path))
+
+    candidates = [*variants, (path, mimetypes.guess_type(path)[0])]
+    return format_html(
+        "image-set({})",
+        format_html_join(
+            ", ", "url('{}') type('{}')", ((static(p), m) for p, m in candidates)
+        ),
+    )
@@ -0,0 +1,73 @@
+"""Test helpers for Pathogens Portal."""
+
+import contextlib
+
+from django.core.cache import caches
+from django.db import connections
+
+from utils.query_budget import QueryRecorder, get_query_budget
+
+
+class QueryBudgetTestMixin:
+    """Mixin for `django.test.TestCase` asserting the query budget of views.
+
+    The caches (pages, rendered views and objects) are emptied before every
+    test: their entries outlive the test transactions, and cache hits would
+    hide the queries of the views.
+
+    Example:
+        .. code-block:: python
+
+            class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+                @classmethod
+                def setUpTestData(cls):
+                    benchmark.seed(topics=30, dashboards=1, dashboard_rows=100)
+
+                def test_query_budgets(self):
+                    self.assertAllQueryBudgets()
+    """
+
+    def setUp(self):
+        """Empty every configured cache."""
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+
+    def assertQueryBudget(self, path, budget=None):
+        """Request a path and assert it stays within its view's query budget.
+
+        Args:
+            path (str): Path to request with the test client.
+            budget (int): Maximum number of queries. Defaults to the
+                `query_budget` of the view handling the path.
+        """
+        recorder = QueryRecorder()
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.client.get(path)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        if budget is None:
+            budget = get_query_budget(response.wsgi_request)
+        if budget is None:
+            self.fail(f"The view of {path} declares no query_budget.")
+        if len(recorder.queries) > budget:
+            self.fail(recorder.report(path, budget))
+
+    def assertAllQueryBudgets(self, routes=None):
+        """Assert the query budget of every route of the portal.
+
+        Args:
+            routes (dict): URL names mapped to paths. Defaults to every named
+                route, with arguments filled from seeded data (see
+                `utils.benchmark.get_routes`).
+        """
+        if routes is None:
+            from utils.benchmark import get_routes
+
+            routes = get_routes()
+        for name, path in routes.items():
+            with self.subTest(route=name):
+                self.assertQueryBudget(path)
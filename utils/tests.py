@@ -0,0 +1,302 @@
+import base64
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pages.home.views import Home
+from pages.topics.models import Topic
+from utils import benchmark, compression, context_processors, metrics, object_cache
+from utils.minify import minify_html
+from utils.testing import QueryBudgetTestMixin
+from utils.views import BaseListView
+
+# Seeded topic thumbnails are written to the media storage
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every route stays within the query budget of its view."""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmark.seed(topics=30, dashboards=1, dashboard_rows=100)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_query_budgets(self):
+        self.assertAllQueryBudgets()
+
+    def test_query_budgets_of_further_pages(self):
+        response = self.client.get("/topics/")
+        self.assertIsNotNone(response.context["next_page_url"])
+        self.assertQueryBudget(f"/topics/{response.context['next_page_url']}")
+
+
+class KeysetPaginationTests(TestCase):
+    """Keyset pages cover every item once, in order, in both directions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Topic.objects.bulk_create(
+            Topic(
+                name=f"Topic {index:02}",
+                slug=f"topic-{index:02}",
+                description="Description",
+                content="Content",
+                thumbnail_image="topics/images/topic.jpg",
+                thumbnail_width=1200,
+                thumbnail_height=800,
+            )
+            for index in range(30)
+        )
+        # Every other topic shares the creation time of the previous one
+        for index, topic in enumerate(Topic.objects.order_by("pk")):
+            Topic.objects.filter(pk=topic.pk).update(
+                created_at=now + timedelta(hours=index // 2)
+            )
+
+    def setUp(self):
+        cache.clear()
+        caches[object_cache.CACHE_ALIAS].clear()
+
+    def get_page(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        names = [topic.name for topic in response.context["topics"]]
+        return names, response.context
+
+    def test_pages_cover_every_item_once(self):
+        names, context = self.get_page("/topics/")
+        pages = [names]
+        while context["next_page_url"]:
+            names, context = self.get_page(f"/topics/{context['next_page_url']}")
+            pages.append(names)
+
+        self.assertEqual([len(page) for page in pages], [24, 6])
+        self.assertEqual(
+            [name for page in pages for name in page],
+            [f"Topic {index:02}" for index in range(30)],
+        )
+
+    def test_previous_page(self):
+        first, context = self.get_page("/topics/")
+        self.assertIsNone(context["previous_page_url"])
+        _second, context = self.get_page(f"/topics/{context['next_page_url']}")
+        self.assertIsNone(context["next_page_url"])
+
+        previous, context = self.get_page(f"/topics/{context['previous_page_url']}")
+        self.assertEqual(previous, first)
+        self.assertIsNone(context["previous_page_url"])
+        self.assertIsNotNone(context["next_page_url"])
+
+    def test_invalid_cursor(self):
+        mismatched = base64.urlsafe_b64encode(b'[["Topic 01"], false]').decode()
+        for cursor in ("not-a-cursor", "e30", mismatched):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/topics/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_only_the_first_page_is_cached(self):
+        objects = caches[object_cache.CACHE_ALIAS]
+        _names, context = self.get_page("/topics/")
+        with mock.patch.object(objects, "set") as cache_set:
+            # The first page is rendered from the cache, without a context
+            self.assertEqual(self.client.get("/topics/").status_code, 200)
+            self.get_page(f"/topics/{context['next_page_url']}")
+        cache_set.assert_not_called()
+
+    def test_ties_are_broken_by_primary_key(self):
+        class TopicsByCreationView(BaseListView):
+            model = Topic
+            ordering = "-created_at"
+            keyset_paginate_by = 3
+
+        expected = list(
+            Topic.objects.order_by("-created_at", "pk").values_list("pk", flat=True)
+        )
+        seen = []
+        cursor = None
+        while True:
+            view = TopicsByCreationView()
+            query = {"cursor": cursor} if cursor else {}
+            view.setup(RequestFactory().get("/", query))
+            page = view.paginate_keyset(view.get_queryset())
+            seen += [topic.pk for topic in page.object_list]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+
+
+class PageCacheTests(SimpleTestCase):
+    """Cached pages are keyed on the path, not on arbitrary query parameters."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown_query_parameters_share_the_page(self):
+        with mock.patch.object(
+            Home, "get_context_data", autospec=True, side_effect=Home.get_context_data
+        ) as get_context_data:
+            for query in ("", "?utm_source=mail", "?x=1", "?x=2"):
+                response = self.client.get(f"/{query}")
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_context_data.call_count, 1)
+
+    def test_listed_query_parameters_are_keyed(self):
+        with (
+            mock.patch.object(Home, "cache_query_params", ("lang",)),
+            mock.patch.object(
+                Home,
+                "get_context_data",
+                autospec=True,
+                side_effect=Home.get_context_data,
+            ) as get_context_data,
+        ):
+            for query in ("?lang=sv", "?lang=sv&x=1", "?lang=en"):
+                self.client.get(f"/{query}")
+        self.assertEqual(get_context_data.call_count, 2)
+
+
+class ContextProcessorTests(SimpleTestCase):
+    """Public routes get no per-user template context."""
+
+    def test_public_routes(self):
+        request = RequestFactory().get("/")
+        for public, expected in ((True, set()), (False, {"user", "perms"})):
+            with self.subTest(public=public):
+                request.is_public_route = public
+                self.assertEqual(set(context_processors.auth(request)), expected)
+        request.is_public_route = True
+        self.assertEqual(context_processors.messages(request), {})
+
+
+class RequestMetricsTests(TestCase):
+    """Timings are only reported to staff users, or with DEBUG."""
+
+    def test_server_timing(self):
+        self.assertNotIn("Server-Timing", self.client.get("/").headers)
+        with override_settings(DEBUG=True):
+            self.assertIn("Server-Timing", self.client.get("/").headers)
+
+        login = reverse("admin:login")
+        self.assertNotIn("Server-Timing", self.client.get(login).headers)
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        self.assertIn("Server-Timing", self.client.get(login).headers)
+
+    def test_snapshots_of_exited_workers_are_removed(self):
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        counts = [0] * len(metrics.QUERY_BUCKETS) + [1]
+        series = [["queries", "other:view", "", [counts, 1, 1000.0]]]
+        with tempfile.TemporaryDirectory() as directory:
+            running = Path(directory) / f"{os.getppid()}.json"
+            stale = Path(directory) / f"{exited.pid}.json"
+            for path in (running, stale):
+                path.write_text(json.dumps(series))
+
+            with override_settings(METRICS_DIR=directory):
+                merged = metrics.merged_series()
+            self.assertEqual(merged[("queries", "other:view", "")][1], 1)
+            self.assertTrue(running.exists())
+            self.assertFalse(stale.exists())
+
+
+class MinifyHtmlTests(SimpleTestCase):
+    """Comments and whitespace runs go, significant whitespace stays."""
+
+    def test_whitespace_is_collapsed(self):
+        self.assertEqual(
+            minify_html("<p>\n    <b>A</b>   <i>B</i>\t\t</p>  "),
+            "<p>\n<b>A</b> <i>B</i> </p> ",
+        )
+
+    def test_comments(self):
+        self.assertEqual(minify_html("<p>A <!-- note -->\n B</p>"), "<p>A\nB</p>")
+        self.assertEqual(
+            minify_html("<!--[if IE]> <p>Old</p> <![endif]-->"),
+            "<!--[if IE]> <p>Old</p> <![endif]-->",
+        )
+        # Comments inside preserved elements are content
+        self.assertEqual(
+            minify_html("<script>\n<!-- x -->\n</script>"),
+            "<script>\n<!-- x -->\n</script>",
+        )
+
+    def test_preserved_elements(self):
+        for html in (
+            "<pre>a\n    b</pre>",
+            '<code class="python">if a:\n    b</code>',
+            "<textarea>  a  </textarea>",
+            "<style>\n  p { margin: 0 }\n</style>",
+            "<SCRIPT>\n  let a =  1;\n</SCRIPT >",
+        ):
+            with self.subTest(html=html):
+                self.assertEqual(
+                    minify_html(f"<div>  {html}  </div>"), f"<div> {html} </div>"
+                )
+
+    def test_prefixed_tags_are_not_preserved(self):
+        self.assertEqual(
+            minify_html("<presentation>a   b</presentation>"),
+            "<presentation>a b</presentation>",
+        )
+
+
+class CompressionTests(SimpleTestCase):
+    """Encodings are negotiated from Accept-Encoding and round trip."""
+
+    def test_choose_encoding(self):
+        for accept_encoding, encoding in (
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("GZIP;q=0.5", "gzip"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, gzip;q=0", None),
+            ("br;q=invalid, gzip;q=0.1", "gzip"),
+            ("*", "br"),
+            ("*;q=0.5, br;q=0", "gzip"),
+            ("identity", None),
+            ("", None),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(compression.choose_encoding(accept_encoding), encoding)
+
+    def test_choose_encoding_without_brotli(self):
+        with mock.patch.object(compression, "brotli", None):
+            self.assertEqual(compression.choose_encoding("br, gzip"), "gzip")
+            self.assertIsNone(compression.choose_encoding("br"))
+
+    def test_streams_round_trip(self):
+        chunks = [b"<p>%d</p>" % number * 100 for number in range(20)]
+        decompress = {"gzip": gzip.decompress}
+        if compression.brotli is not None:
+            decompress["br"] = compression.brotli.decompress
+        for encoding in compression.get_encodings():
+            with self.subTest(encoding=encoding):
+                stream = b"".join(compression.compress_stream(chunks, encoding))
+                self.assertEqual(decompress[encoding](stream), b"".join(chunks))
+                self.assertEqual(
+                    decompress[encoding](
+                        compression.compress(b"".join(chunks), encoding)
+                    ),
+                    b"".join(chunks),
+                )
@@ -10,5 +10,22 @@ imported in this file should also be added to __all__
 from ._base_template_view import BaseTemplateView
 from ._base_list_view import BaseListView
 from ._base_detail_view import BaseDetailView
+from ._active_filter import ActiveFilterMixin
+from ._conditional_get import ConditionalGetMixin
+from ._html_minify import HtmlMinifyMixin
+from ._keyset_pagination import KeysetPage, KeysetPaginationMixin
+from ._metrics_view import MetricsView
+from ._object_cache import ObjectCacheMixin
 
-__all__ = ["BaseTemplateView", "BaseListView", "BaseDetailView"]
+__all__ = [
+    "BaseTemplateView",
+    "BaseListView",
+    "BaseDetailView",
+    "ActiveFilterMixin",
+    "ConditionalGetMixin",
+    "HtmlMinifyMixin",
+    "KeysetPage",
+    "KeysetPaginationMixin",
+    "MetricsView",
+    "ObjectCacheMixin",
+]
@@ -0,0 +1,51 @@
+from types import MappingProxyType
+
+from django.core.exceptions import FieldError, ImproperlyConfigured, ValidationError
+
+
+class ActiveFilterMixin:
+    """Mixin compiling the `filter_*` attributes of a view into one lookup.
+
+    When a subclass is defined, its `filter_*` class attributes (including
+    inherited ones) are collected into a lookup dict, together with
+    `is_active=True`, and validated against the view model. A typo in a
+    filter name therefore fails at import time instead of being ignored,
+    and requests reuse the prepared (read-only) lookup.
+
+    Example:
+        ``filter_status = "published"`` and ``filter_category__slug = "research"``
+        compile to ``{"is_active": True, "status": "published",
+        "category__slug": "research"}``.
+    """
+
+    _filter_lookup = MappingProxyType({"is_active": True})
+
+    def __init_subclass__(cls, **kwargs):
+        """Compile and validate the filter lookup of the new view class."""
+        super().__init_subclass__(**kwargs)
+        cls._filter_lookup = cls.compile_filter_lookup()
+
+    @classmethod
+    def compile_filter_lookup(cls):
+        """Return the read-only lookup of the `filter_*` attributes of the class.
+
+        Raises:
+            ImproperlyConfigured: If a lookup does not apply to the model.
+        """
+        lookup = {"is_active": True}
+        for name in dir(cls):
+            value = getattr(cls, name)
+            if name.startswith("filter_") and not callable(value):
+                lookup[name.removeprefix("filter_")] = value
+
+        model = getattr(cls, "model", None)
+        if model is not None:
+            try:
+                # Resolves the lookups without querying the database
+                model._base_manager.filter(**lookup)
+            except (FieldError, ValidationError, ValueError) as error:
+                raise ImproperlyConfigured(
+                    f"{cls.__name__} has an invalid filter for {model.__name__}: "
+                    f"{error}"
+                ) from error
+        return MappingProxyType(lookup)
@@ -1,7 +1,22 @@
+from django.http import Http404
+from django.utils.translation import gettext as _
 from django.views.generic import DetailView
 
+from utils import object_cache
 
-class BaseDetailView(DetailView):
+from ._active_filter import ActiveFilterMixin
+from ._conditional_get import ConditionalGetMixin
+from ._html_minify import HtmlMinifyMixin
+from ._object_cache import ObjectCacheMixin
+
+
+class BaseDetailView(
+    ActiveFilterMixin,
+    ConditionalGetMixin,
+    ObjectCacheMixin,
+    HtmlMinifyMixin,
+    DetailView,
+):
     """Base detail view for displaying individual active items with custom filtering.
 
     This class provides common functionality for displaying individual model
@@ -13,8 +28,25 @@ class BaseDetailView(DetailView):
         slug_field (str): Model field for URL lookups. Defaults to "slug".
         slug_url_kwarg (str): URL keyword argument name. Defaults to "slug".
         extra_context (dict): Additional context data. Optional.
-        filter_* (any): Custom filter attributes. Any attribute starting with
-            'filter_' will be used as a filter condition.
+        query_budget (int): Maximum number of database queries per request,
+            enforced in development (see `utils.query_budget`). Optional.
+        read_from_replica (bool): Read from the replica database when one is
+            configured (see `utils.db`). Defaults to True.
+        public_route (bool): Serve GET/HEAD requests without sessions, CSRF,
+            auth or messages, and without cookies (see
+            `utils.middleware.PublicRouteMiddleware`). Defaults to True.
+        last_modified_field (str): Model field used for conditional GET
+            validators. Defaults to "updated_at".
+        object_cache_timeout (int): Seconds to keep the object in the object
+            cache (see `ObjectCacheMixin`). Defaults to 10 minutes, None
+            disables the cache.
+        object_cache_missing_timeout (int): Seconds to remember that no
+            object matches the URL. Defaults to one minute.
+        minify_html (bool): Minify the rendered HTML (see `HtmlMinifyMixin`).
+            Defaults to the `HTML_MINIFY` setting.
+        filter_* (any): Custom filter attributes. Any class attribute starting
+            with 'filter_' will be used as a filter condition; they are
+            compiled and checked against the model when the class is defined.
 
     Example:
         For a Topic model:
@@ -42,6 +74,11 @@ class BaseDetailView(DetailView):
         - Uses 'slug' field for URL lookups
         - Adds title to context (custom or object.__str__)
         - Merges extra_context into context
+        - Answers conditional GET requests with 304 when the object's
+          `updated_at` has not changed
+        - Keeps the object and the rendered (and minified) page in the
+          object cache until it is saved or deleted, and remembers unknown slugs for a minute, so repeated
+          requests (e.g. from bots) do not reach the database
 
     Note:
         Model must have `is_active` boolean field and implement `__str__` method.
@@ -54,18 +91,50 @@ class BaseDetailView(DetailView):
     slug_field = "slug"
     slug_url_kwarg = "slug"
     extra_context = None
+    query_budget = None
+    read_from_replica = True
+    public_route = True
 
     def get_queryset(self):
         """Return active items with custom filters applied"""
-        # Get custom filter arguments from class attributes
-        filter_args = {
-            k.replace("filter_", ""): v
-            for k, v in vars(self).items()
-            if k.startswith("filter_")
-        }
-
-        # Always filter by is_active=True and apply any custom filters
-        return self.model.objects.filter(is_active=True, **filter_args)
+        # Always filter by is_active=True and apply any custom filters,
+        # compiled from the filter_* attributes when the class was defined
+        return self.model.objects.filter(**self._filter_lookup)
+
+    def get_object(self, queryset=None):
+        """Return the object from the object cache, or raise 404 if missing."""
+        if queryset is not None:
+            return super().get_object(queryset)
+
+        def fetch():
+            try:
+                return super(BaseDetailView, self).get_object()
+            except Http404:
+                return object_cache.MISSING
+
+        obj = self.cached("object", fetch)
+        if object_cache.is_missing(obj):
+            raise Http404(
+                _("No %(verbose_name)s found matching the query")
+                % {"verbose_name": self.model._meta.verbose_name}
+            )
+        return obj
+
+    def get(self, request, *args, **kwargs):
+        """Return 304 if the object is unchanged, else render the object."""
+        self.object = self.get_object()
+
+        has_validators = self.has_validators()
+        if has_validators:
+            response = self.conditional_response(
+                request, getattr(self.object, self.last_modified_field), self.object.pk
+            )
+            if response is not None:
+                return response
+
+        context = self.get_context_data(object=self.object)
+        response = self.render_cached(context)
+        return self.set_validators(response) if has_validators else response
 
     def get_context_data(self, **kwargs):
         """Add title and extra_context to context"""
@@ -1,7 +1,23 @@
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.translation import gettext as _
 from django.views.generic import ListView
 
-
-class BaseListView(ListView):
+from ._active_filter import ActiveFilterMixin
+from ._conditional_get import ConditionalGetMixin
+from ._html_minify import HtmlMinifyMixin
+from ._keyset_pagination import KeysetPaginationMixin
+from ._object_cache import ObjectCacheMixin
+
+
+class BaseListView(
+    ActiveFilterMixin,
+    ConditionalGetMixin,
+    ObjectCacheMixin,
+    HtmlMinifyMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """Base list view for displaying collections of active items with custom filtering.
 
     This class provides common functionality for listing model instances that
@@ -12,8 +28,29 @@ class BaseListView(ListView):
         title (str): Page title to add to context. Defaults to empty string.
         ordering (str): Field name to order results by. Optional.
         extra_context (dict): Additional context data. Optional.
-        filter_* (any): Custom filter attributes. Any attribute starting with
-            'filter_' will be used as a filter condition.
+        query_budget (int): Maximum number of database queries per request,
+            enforced in development (see `utils.query_budget`). Optional.
+        read_from_replica (bool): Read from the replica database when one is
+            configured (see `utils.db`). Defaults to True.
+        public_route (bool): Serve GET/HEAD requests without sessions, CSRF,
+            auth or messages, and without cookies (see
+            `utils.middleware.PublicRouteMiddleware`). Defaults to True.
+        only_fields (tuple): Fields to load, all others are deferred. Optional.
+        defer_fields (tuple): Fields not to load until accessed. Optional.
+        keyset_paginate_by (int): Number of items per page, paginated with
+            a cursor on the ordering fields. Optional.
+        cursor_query_param (str): Query parameter holding the page cursor.
+            Defaults to "cursor".
+        last_modified_field (str): Model field used for conditional GET
+            validators. Defaults to "updated_at".
+        object_cache_timeout (int): Seconds to keep the validators and the
+            listed items in the object cache (see `ObjectCacheMixin`).
+            Defaults to 10 minutes, None disables the cache.
+        minify_html (bool): Minify the rendered HTML (see `HtmlMinifyMixin`).
+            Defaults to the `HTML_MINIFY` setting.
+        filter_* (any): Custom filter attributes. Any class attribute starting
+            with 'filter_' will be used as a filter condition; they are
+            compiled and checked against the model when the class is defined.
 
     Example:
         For a Topic model:
@@ -27,6 +64,8 @@ class BaseListView(ListView):
                 title = "Research Topics"
                 ordering = "name"
                 extra_context = {"show_filters": True, "page_size": 20}
+                only_fields = ("name", "slug", "description")
+                keyset_paginate_by = 20
 
         For custom filtering:
 
@@ -41,8 +80,16 @@ class BaseListView(ListView):
         This automatically:
         - Filters by is_active=True and any custom filter_* attributes
         - Orders by specified field
+        - Loads only the declared fields (`only_fields`/`defer_fields`)
+        - Paginates with a cursor (see `KeysetPaginationMixin`) if
+          `keyset_paginate_by` is set
         - Adds title to context
         - Merges extra_context into context
+        - Answers conditional GET requests with 304 when neither the latest
+          `updated_at` nor the number of items has changed
+        - Keeps the validators, the listed items and the rendered (and
+          minified) page in the object cache, until an item is saved or
+          deleted; only the first page is cached when paginated
 
     Note:
         Model must have `is_active` boolean field. All queries will filter by is_active=True
@@ -51,18 +98,23 @@ class BaseListView(ListView):
 
     title = ""
     extra_context = None
+    query_budget = None
+    read_from_replica = True
+    public_route = True
+    only_fields = None
+    defer_fields = None
 
     def get_queryset(self):
         """Return active items with custom filters applied, ordered by specified field"""
-        # Get custom filter arguments from class attributes
-        filter_args = {
-            k.replace("filter_", ""): v
-            for k, v in vars(self).items()
-            if k.startswith("filter_")
-        }
+        # Always filter by is_active=True and apply any custom filters,
+        # compiled from the filter_* attributes when the class was defined
+        queryset = self.model.objects.filter(**self._filter_lookup)
 
-        # Always filter by is_active=True and apply any custom filters
-        queryset = self.model.objects.filter(is_active=True, **filter_args)
+        # Only load the columns the template needs
+        if self.only_fields:
+            queryset = queryset.only(*self.only_fields)
+        if self.defer_fields:
+            queryset = queryset.defer(*self.defer_fields)
 
         # Apply ordering if specified
         if self.ordering:
@@ -70,6 +122,63 @@ class BaseListView(ListView):
 
         return queryset
 
+    def get(self, request, *args, **kwargs):
+        """Return 304 if the filtered items are unchanged, else render the list."""
+        has_validators = self.has_validators()
+        if has_validators:
+            state = self.cached(
+                "state",
+                lambda: (
+                    self.get_queryset()
+                    .order_by()
+                    .aggregate(**self.get_state_aggregates())
+                ),
+            )
+            response = self.conditional_response(
+                request, state["last_modified"], state["count"]
+            )
+            if response is not None:
+                return response
+
+        queryset = self.get_queryset()
+        if self.keyset_paginate_by:
+            if self.cursor_query_param in request.GET:
+                # Only the first page is cached: every cursor would otherwise
+                # add an entry, letting crawlers evict the useful ones
+                page = self.paginate_keyset(queryset)
+            else:
+                page = self.cached("page", lambda: self.paginate_keyset(queryset))
+            self.object_list = page.object_list
+            kwargs["page_obj"] = page
+        else:
+            self.object_list = self.cached("list", lambda: list(queryset))
+        self.check_allow_empty()
+
+        context = self.get_context_data(**kwargs)
+        response = self.render_cached(context)
+        return self.set_validators(response) if has_validators else response
+
+    def check_allow_empty(self):
+        """Raise 404 if the list is empty and `allow_empty` is False."""
+        if not self.get_allow_empty() and not self.object_list:
+            raise Http404(
+                _("Empty list and “%(class_name)s.allow_empty” is False.")
+                % {"class_name": self.__class__.__name__}
+            )
+
+    def get_context_object_name(self, object_list):
+        """Name the list after the model, as it is fetched into a list."""
+        if self.context_object_name:
+            return self.context_object_name
+        return f"{self.model._meta.model_name}_list"
+
+    def get_state_aggregates(self):
+        """Return the aggregates the conditional GET validators derive from."""
+        return {
+            "last_modified": Max(self.last_modified_field),
+            "count": Count("pk"),
+        }
+
     def get_context_data(self, **kwargs):
         """Add title and extra_context to context"""
         context = super().get_context_data(**kwargs)
@@ -1,7 +1,16 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
 from django.views.generic import TemplateView
 
+from utils.cache import get_templates_version
+
+from ._html_minify import HtmlMinifyMixin
 
-class BaseTemplateView(TemplateView):
+
+class BaseTemplateView(HtmlMinifyMixin, TemplateView):
     """Base template view for static pages.
 
     This class can be inherited by static page view classes that only
@@ -12,6 +21,21 @@ class BaseTemplateView(TemplateView):
         title (str): Page title to add to context. Optional.
         description (str): Meta description to add to context. Optional.
         extra_context (dict): Additional context data. Optional.
+        query_budget (int): Maximum number of database queries per request,
+            enforced in development (see `utils.query_budget`). Optional.
+        cache_timeout (int): Seconds to keep the rendered response in the
+            cache. Caching is disabled when None (default).
+        cache_vary_on (tuple): Request headers the cached response varies on,
+            e.g. ("Accept-Language",). Optional.
+        cache_query_params (tuple): Query parameters the page depends on.
+            Others (e.g. `utm_source`) are left out of the cache key, so they
+            cannot be used to bypass or fill the cache. Defaults to none.
+        cache_alias (str): Cache backend (from settings.CACHES) to use.
+        minify_html (bool): Minify the rendered HTML (see `HtmlMinifyMixin`).
+            Defaults to the `HTML_MINIFY` setting.
+        public_route (bool): Serve GET/HEAD requests without sessions, CSRF,
+            auth or messages, and without cookies (see
+            `utils.middleware.PublicRouteMiddleware`). Defaults to True.
 
     Example:
         For a static about page:
@@ -23,11 +47,81 @@ class BaseTemplateView(TemplateView):
                 title = "About Us"
                 description = "Learn about our organization"
                 extra_context = {"show_contact": True}
+                cache_timeout = 60 * 60  # Cache the rendered page for an hour
+
+    Note:
+        Only GET/HEAD requests that are anonymous or to a public route are
+        served from and stored in the cache, and responses setting cookies
+        are never stored. Pages are stored minified when `minify_html` is
+        enabled. Cache keys include a digest of all templates, so deploying
+        changed templates invalidates the cached pages.
     """
 
     title = ""
     description = ""
     extra_context = None
+    query_budget = None
+    cache_timeout = None
+    cache_vary_on = ()
+    cache_query_params = ()
+    cache_alias = "default"
+    public_route = True
+
+    def dispatch(self, request, *args, **kwargs):
+        """Serve the response from the cache when caching is enabled."""
+        if not self.is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = caches[self.cache_alias]
+        cache_key = self.get_cache_key(request)
+        response = cache.get(cache_key)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        return self.cache_response(cache, cache_key, response)
+
+    def cache_response(self, cache, cache_key, response):
+        """Store the response in the cache once it is rendered."""
+        if self.cache_vary_on:
+            patch_vary_headers(response, self.cache_vary_on)
+
+        def store(response):
+            if response.status_code == 200 and not response.cookies:
+                cache.set(cache_key, response, self.cache_timeout)
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    def is_cacheable(self, request):
+        """Return True if the response for this request can be cached."""
+        return (
+            self.cache_timeout is not None
+            and request.method in ("GET", "HEAD")
+            and (
+                # Public routes ignore the session, see PublicRouteMiddleware
+                getattr(request, "is_public_route", False)
+                or settings.SESSION_COOKIE_NAME not in request.COOKIES
+            )
+        )
+
+    def get_cache_key(self, request):
+        """Return the cache key for the response to this request.
+
+        The key depends on the scheme, host and path of the request and on the
+        values of `cache_query_params`, not on the rest of the query string.
+        """
+        key = hashlib.md5(request.build_absolute_uri(request.path).encode())
+        for param in self.cache_query_params:
+            key.update(repr((param, request.GET.getlist(param))).encode())
+        for header in self.cache_vary_on:
+            key.update(request.headers.get(header, "").encode())
+
+        view = f"{type(self).__module__}.{type(self).__qualname__}"
+        return f"page:{view}:{get_templates_version()}:{key.hexdigest()}"
 
     def get_context_data(self, **kwargs):
         """Add title, description, and extra_context to template context."""
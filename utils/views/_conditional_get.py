@@ -0,0 +1,60 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from utils.cache import get_templates_version
+
+
+class ConditionalGetMixin:
+    """Mixin answering conditional GET requests before any rendering.
+
+    Views compute cheap validators (a last modification time and the parts an
+    ETag is derived from) and call `conditional_response()`. When the client
+    already holds the current version, a 304 response without body is
+    returned; otherwise the validators are added to the rendered response
+    with `set_validators()`.
+
+    The ETag also covers the templates version and the requested URL, so
+    deploying changed templates or requesting another page of a list never
+    matches a stale validator.
+
+    Attributes:
+        last_modified_field (str): Model field holding the last modification
+            time. Conditional GET is disabled if None or if the model has no
+            such field. Defaults to "updated_at".
+    """
+
+    last_modified_field = "updated_at"
+
+    def has_validators(self):
+        """Return True if the view model provides the last modification field."""
+        if not self.last_modified_field:
+            return False
+        field_names = {field.name for field in self.model._meta.get_fields()}
+        return self.last_modified_field in field_names
+
+    def conditional_response(self, request, last_modified, *etag_parts):
+        """Return a 304 response if the client's validators match, else None."""
+        self._etag = self.make_etag(request, last_modified, *etag_parts)
+        self._last_modified = (
+            int(last_modified.timestamp()) if last_modified is not None else None
+        )
+        return get_conditional_response(
+            request, etag=self._etag, last_modified=self._last_modified
+        )
+
+    def make_etag(self, request, *parts):
+        """Return a quoted ETag derived from the given validator parts."""
+        digest = hashlib.md5(request.get_full_path().encode())
+        digest.update(get_templates_version().encode())
+        for part in parts:
+            digest.update(repr(part).encode())
+        return quote_etag(digest.hexdigest())
+
+    def set_validators(self, response):
+        """Add the ETag and Last-Modified headers computed for this request."""
+        response.headers.setdefault("ETag", self._etag)
+        if self._last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(self._last_modified))
+        return response
@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from utils.minify import minify_html
+
+
+class HtmlMinifyMixin:
+    """Mixin minifying the HTML rendered by a template view.
+
+    Comments are stripped and whitespace collapsed (see `utils.minify`) in a
+    post-render callback, so pages kept in a cache (see `BaseTemplateView`
+    and `ObjectCacheMixin.render_cached()`) are stored minified and served
+    without running the minifier again.
+
+    Attributes:
+        minify_html (bool): Minify the rendered HTML. Defaults to the
+            `HTML_MINIFY` setting when None.
+    """
+
+    minify_html = None
+
+    def render_to_response(self, context, **response_kwargs):
+        """Render the template, minifying the result when enabled."""
+        response = super().render_to_response(context, **response_kwargs)
+        if self.should_minify_html():
+            response.add_post_render_callback(self.minify_response)
+        return response
+
+    def should_minify_html(self):
+        """Return True if the rendered HTML should be minified."""
+        if self.minify_html is None:
+            return settings.HTML_MINIFY
+        return self.minify_html
+
+    def minify_response(self, response):
+        """Replace the content of a rendered HTML response by its minified version."""
+        if response["Content-Type"].startswith("text/html"):
+            html = response.content.decode(response.charset)
+            response.content = minify_html(html)
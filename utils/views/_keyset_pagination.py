@@ -0,0 +1,218 @@
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """A page of a keyset paginated list.
+
+    Attributes:
+        object_list (list): Items of the page, in list order.
+        next_cursor (str): Cursor of the following page, or None.
+        previous_cursor (str): Cursor of the preceding page, or None.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginationMixin:
+    """Mixin paginating a list view on its ordering fields (cursor paging).
+
+    Instead of skipping `OFFSET` rows, a page is requested with a cursor
+    holding the ordering values of the item it starts after (or before), and
+    the database seeks to it through the ordering index. Deep pages therefore
+    cost the same as the first one, and items added or removed meanwhile do
+    not shift the pages.
+
+    The primary key is appended to the ordering as a tie-breaker, so the
+    ordering fields do not need to be unique. They must be concrete,
+    non-nullable fields of the model itself.
+
+    Attributes:
+        keyset_paginate_by (int): Number of items per page. Pagination is
+            disabled if None. Defaults to None.
+        cursor_query_param (str): Query parameter holding the cursor.
+            Defaults to "cursor".
+
+    Note:
+        The context gets `page_obj` (a `KeysetPage`) and `is_paginated`, plus
+        `next_page_url`/`previous_page_url` (None on the first/last page).
+    """
+
+    keyset_paginate_by = None
+    cursor_query_param = "cursor"
+
+    def get_keyset_fields(self):
+        """Return the (field, descending) pairs the list is paginated on."""
+        ordering = self.get_ordering() or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        keys = []
+        for name in ordering:
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            try:
+                field = (
+                    self.model._meta.pk
+                    if name == "pk"
+                    else self.model._meta.get_field(name)
+                )
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} cannot paginate on '{name}': keyset "
+                    "ordering must use concrete fields of the model itself."
+                )
+            keys.append((field, descending))
+
+        if not any(field.primary_key for field, _descending in keys):
+            keys.append((self.model._meta.pk, False))
+        return keys
+
+    def encode_cursor(self, item, keys, backwards=False):
+        """Return the cursor starting a page after (or before) the given item."""
+        values = [field.value_from_object(item) for field, _descending in keys]
+        # DjangoJSONEncoder drops microseconds, which would skip close items
+        values = [
+            value.isoformat() if isinstance(value, datetime.datetime) else value
+            for value in values
+        ]
+        payload = json.dumps([values, backwards], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, keys):
+        """Return the ordering values and direction of a cursor.
+
+        Raises:
+            Http404: If the cursor is malformed.
+        """
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            values, backwards = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            if len(values) != len(keys):
+                raise ValueError("Cursor does not match the ordering")
+            values = [
+                field.to_python(value)
+                for (field, _descending), value in zip(keys, values, strict=True)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError) as error:
+            raise Http404("Invalid page cursor") from error
+        return values, bool(backwards)
+
+    def seek(self, queryset, keys, values, backwards):
+        """Filter the queryset to the items after (or before) the given values."""
+        conditions = []
+        for index, ((field, descending), value) in enumerate(
+            zip(keys, values, strict=True)
+        ):
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {
+                key.attname: values[position]
+                for position, (key, _descending) in enumerate(keys[:index])
+            }
+            conditions.append(Q(**equal, **{f"{field.attname}__{lookup}": value}))
+        return queryset.filter(reduce(or_, conditions))
+
+    def paginate_keyset(self, queryset):
+        """Return the page of the queryset selected by the request cursor."""
+        queryset, keys, cursor, backwards = self.get_keyset_query(queryset)
+        return self.make_keyset_page(list(queryset), keys, cursor, backwards)
+
+    def get_keyset_query(self, queryset):
+        """Return the queryset of the requested page, plus one item.
+
+        Returns:
+            tuple: The sliced queryset, the keyset fields, the request cursor
+            and whether the page is requested backwards.
+        """
+        keys = self.get_keyset_fields()
+        cursor = self.request.GET.get(self.cursor_query_param)
+
+        backwards = False
+        if cursor:
+            values, backwards = self.decode_cursor(cursor, keys)
+            queryset = self.seek(queryset, keys, values, backwards)
+
+        ordering = [
+            f"-{field.attname}" if descending != backwards else field.attname
+            for field, descending in keys
+        ]
+        queryset = queryset.order_by(*ordering)[: self.keyset_paginate_by + 1]
+        return queryset, keys, cursor, backwards
+
+    def make_keyset_page(self, items, keys, cursor, backwards):
+        """Return the page built from the items fetched for the cursor."""
+        size = self.keyset_paginate_by
+        has_more = len(items) > size
+        items = items[:size]
+        if backwards:
+            items.reverse()
+
+        # A cursor means there are items on the side the request came from
+        if backwards:
+            has_next, has_previous = bool(cursor), has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        return KeysetPage(
+            items,
+            self.encode_cursor(items[-1], keys) if has_next and items else None,
+            self.encode_cursor(items[0], keys, backwards=True)
+            if has_previous and items
+            else None,
+        )
+
+    def get_page_url(self, cursor):
+        """Return the current URL with the given page cursor, or None."""
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query[self.cursor_query_param] = cursor
+        return f"?{query.urlencode()}"
+
+    def get_context_data(self, **kwargs):
+        """Paginate the list with the request cursor if enabled."""
+        if not self.keyset_paginate_by:
+            return super().get_context_data(**kwargs)
+
+        object_list = kwargs.pop("object_list", self.object_list)
+        # The page may already be fetched (e.g. from the object cache)
+        page = kwargs.pop("page_obj", None) or self.paginate_keyset(object_list)
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context.update(
+            {
+                "page_obj": page,
+                "is_paginated": page.has_other_pages,
+                "next_page_url": self.get_page_url(page.next_cursor),
+                "previous_page_url": self.get_page_url(page.previous_cursor),
+            }
+        )
+        return context
@@ -0,0 +1,36 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from utils.metrics import render_prometheus
+
+
+class MetricsView(View):
+    """Expose the request metrics in the Prometheus text format.
+
+    Only staff users (logged in through the admin) can read the metrics, or
+    scrapers sending `Authorization: Bearer <METRICS_TOKEN>` when the
+    `METRICS_TOKEN` setting is configured.
+    """
+
+    http_method_names = ("get", "head")
+
+    def has_access(self, request):
+        """Return True if the request may read the metrics."""
+        if request.user.is_active and request.user.is_staff:
+            return True
+        token = getattr(settings, "METRICS_TOKEN", "")
+        authorization = request.headers.get("Authorization", "")
+        return bool(token) and hmac.compare_digest(
+            authorization.encode(), f"Bearer {token}".encode()
+        )
+
+    def get(self, request, *args, **kwargs):
+        """Return the merged histograms of all worker processes."""
+        if not self.has_access(request):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            render_prometheus(), content_type="text/plain; version=0.0.4"
+        )
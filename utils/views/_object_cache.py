@@ -0,0 +1,130 @@
+from django.core.cache import caches
+
+from utils import object_cache
+from utils.cache import get_templates_version
+
+
+class ObjectCacheMixin:
+    """Mixin keeping the objects and query results of a view in a shared cache.
+
+    Views wrap their queries with `cached()`; results are stored in the "objects" cache under the current
+    generation of the view model, which is renewed whenever an instance is
+    saved or deleted (see `utils.object_cache`). Template views can keep
+    their rendered pages there too with `render_cached()`.
+
+    Attributes:
+        object_cache_timeout (int): Seconds to keep entries, as a bound on
+            staleness for changes not sent through signals. The cache is
+            disabled if None. Defaults to 10 minutes.
+        object_cache_missing_timeout (int): Seconds to remember that an
+            object does not exist. Defaults to one minute.
+        object_cache_query_params (tuple): Query parameters the entries and
+            rendered pages depend on (e.g. a filter). Defaults to none.
+    """
+
+    object_cache_timeout = 60 * 10
+    object_cache_missing_timeout = 60
+    object_cache_query_params = ()
+
+    def get_object_cache_query_params(self):
+        """Return the query parameters the entries depend on."""
+        return self.object_cache_query_params
+
+    def get_object_cache_key_parts(self, name):
+        """Return what the named entry depends on, besides the model.
+
+        Defaults to the view, its URL arguments (e.g. the slug) and the
+        values of `get_object_cache_query_params()`. Other query parameters
+        are left out, so that they cannot be used to bypass or fill the cache.
+        """
+        view = f"{type(self).__module__}.{type(self).__qualname__}"
+        query = [
+            (param, self.request.GET.getlist(param))
+            for param in self.get_object_cache_query_params()
+        ]
+        return (view, name, sorted(self.kwargs.items()), query)
+
+    def cached(self, name, compute):
+        """Return the named entry for this request, computing it on a miss.
+
+        Args:
+            name (str): Name of the entry within the view.
+            compute (callable): Returns the value, which must be picklable;
+                `object_cache.MISSING` for objects that do not exist.
+        """
+        if self.object_cache_timeout is None:
+            return compute()
+
+        cache = caches[object_cache.CACHE_ALIAS]
+        generation = object_cache.get_generation(self.model)
+        key = object_cache.make_key(
+            self.model, generation, *self.get_object_cache_key_parts(name)
+        )
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            if object_cache.is_storable(generation):
+                cache.set(key, value, self.get_object_cache_timeout(value))
+        return value
+
+    def get_object_cache_timeout(self, value):
+        """Return the seconds to keep a value in the cache."""
+        if object_cache.is_missing(value):
+            return self.object_cache_missing_timeout
+        return self.object_cache_timeout
+
+    def get_render_cache_key(self, generation):
+        """Return the key of the rendered page for this request.
+
+        Besides the entry key parts, the page depends on the templates and
+        on the scheme, host and path of the request (e.g. absolute links).
+        """
+        return object_cache.make_key(
+            self.model,
+            generation,
+            *self.get_object_cache_key_parts("render"),
+            get_templates_version(),
+            self.request.build_absolute_uri(self.request.path),
+        )
+
+    def is_render_cacheable(self):
+        """Return True if the page depends on no query parameter left out of keys.
+
+        Pages may link to the current query string (e.g. page links), so
+        pages requested with other query parameters are not cached.
+        """
+        return set(self.request.GET) <= set(self.get_object_cache_query_params())
+
+    def render_cached(self, context, **response_kwargs):
+        """Render the response, reusing the content rendered for a previous request.
+
+        The content is stored after the post-render callbacks (e.g. HTML
+        minification) have run, and only for successful responses.
+        """
+        response = self.render_to_response(context, **response_kwargs)
+        if self.object_cache_timeout is None or not self.is_render_cacheable():
+            return response
+
+        cache = caches[object_cache.CACHE_ALIAS]
+        generation = object_cache.get_generation(self.model)
+        key = self.get_render_cache_key(generation)
+        content = cache.get(key)
+        if content is not None:
+            # Marks the response as rendered, skipping the template
+            response.content = content
+            return response
+        return self.store_rendered(response, cache, key, generation)
+
+    def store_rendered(self, response, cache, key, generation):
+        """Store the content of the response in the cache once it is rendered."""
+
+        def store(response):
+            if (
+                response.status_code == 200
+                and not response.cookies
+                and object_cache.is_storable(generation)
+            ):
+                cache.set(key, response.content, self.object_cache_timeout)
+
+        response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,156 @@
+"""Worker warm-up for Pathogens Portal.
+
+Steps run once per process before it serves traffic (see `core.wsgi` and
+the `WARM_UP` setting), so that no request pays one-time costs such as
+importing views, parsing templates or loading the markdown extensions.
+Gunicorn runs them in the master process (`--preload`), and the forked
+workers share the result copy-on-write.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+
+from utils.db import close_connections
+
+logger = logging.getLogger(__name__)
+
+# Markdown exercising the extensions used for topics (tables, fenced and
+# indented code blocks)
+MARKDOWN_SAMPLE = """# Warm-up
+
+| Column | Value |
+| ------ | ----- |
+| a      | 1     |
+
+```python
+print("warm-up")
+```
+
+    SELECT 1;
+"""
+
+
+def get_project_templates():
+    """Return the names of the project's own templates, per template engine.
+
+    Only template directories inside the project (`core/templates` and
+    `pages/*/templates`) are considered, not those of third-party apps.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    templates = []
+    for engine in engines.all():
+        for template_dir in engine.template_dirs:
+            template_dir = Path(template_dir).resolve()
+            if not template_dir.is_relative_to(base_dir):
+                continue
+            templates += [
+                (engine, path.relative_to(template_dir).as_posix())
+                for path in sorted(template_dir.rglob("*.html"))
+            ]
+    return templates
+
+
+def compile_templates():
+    """Compile every project template into the template loader cache.
+
+    With the cached template loader (see production settings), compiled
+    templates then stay in memory for the lifetime of the process.
+
+    Returns:
+        int: The number of compiled templates.
+    """
+    start = time.perf_counter()
+    templates = get_project_templates()
+    for engine, name in templates:
+        engine.get_template(name)
+    logger.info(
+        "Compiled %d templates in %.1f ms",
+        len(templates),
+        (time.perf_counter() - start) * 1000,
+    )
+    return len(templates)
+
+
+def _iter_url_names(patterns, namespace=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f"{namespace}{pattern.namespace}:"
+            yield from _iter_url_names(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield f"{namespace}{pattern.name}"
+
+
+def resolve_urls():
+    """Import every view and reverse every named URL without arguments.
+
+    Loading the URLconf imports all views; reversing populates the
+    resolvers' reverse lookup tables for every namespace.
+
+    Returns:
+        int: The number of URL names reversed.
+    """
+    resolver = get_resolver()
+    count = 0
+    for name in dict.fromkeys(_iter_url_names(resolver.url_patterns)):
+        try:
+            reverse(name)
+        except NoReverseMatch:
+            # The URL takes arguments, its namespace is populated anyway
+            continue
+        count += 1
+    return count
+
+
+def prime_markdown():
+    """Render sample markdown to load the markdown extensions."""
+    from pages.topics.models import render_markdown
+
+    return len(render_markdown(MARKDOWN_SAMPLE))
+
+
+def check_databases():
+    """Connect to every database once, then close the connections.
+
+    This imports the database drivers and runs the connection setup, and
+    fails fast if a database is unreachable. Connections (and pools) are
+    closed again as they must not be shared with forked workers.
+    """
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    close_connections()
+    return len(connections.all())
+
+
+def warm_up():
+    """Run every warm-up step, logging their duration.
+
+    Returns:
+        dict: Step names mapped to their duration in milliseconds.
+    """
+    steps = {
+        "urls": resolve_urls,
+        "templates": compile_templates,
+        "markdown": prime_markdown,
+        "database": check_databases,
+    }
+    timings = {}
+    start = time.perf_counter()
+    for name, step in steps.items():
+        step_start = time.perf_counter()
+        step()
+        timings[name] = (time.perf_counter() - step_start) * 1000
+    logger.info(
+        "Warm-up done in %.1f ms (%s)",
+        (time.perf_counter() - start) * 1000,
+        ", ".join(f"{name}: {duration:.1f} ms" for name, duration in timings.items()),
+    )
+    return timings